@@ -1,9 +1,11 @@
 import tkinter as tk
-import numpy as np
 from PIL import Image, ImageTk
 import time
+import numpy as np
 
 class AnalyticsPage(tk.Frame):
+    STAT_POINTS = 2000
+
     def __init__(self, master, telemetry, user, **kwargs):
         super().__init__(master, bg="#161f26", **kwargs)
         self.telemetry = telemetry
@@ -27,33 +29,29 @@ class AnalyticsPage(tk.Frame):
         card = tk.Frame(self, bg="#101d29", bd=3, relief="groove")
         card.pack(padx=20, pady=22, fill="x")
         tk.Label(card, text="Mission Analytics", font=("Consolas", 22, "bold"), fg="#00eeff", bg="#101d29").pack(pady=12)
-        self.stats_text = tk.Text(card, height=10, width=85, bg="#17232f", fg="#bbffee", font=("Consolas", 15))
+        self.stats_text = tk.Text(card, height=20, width=85, bg="#17232f", fg="#bbffee", font=("Consolas", 15))
         self.stats_text.pack(pady=8, padx=8)
         tk.Button(self, text="Download Analytics", font=("Consolas", 14, "bold"), bg="#131e2a", fg="#00ffea", command=self.save_analytics).pack(pady=14)
         self.after(1200, self.update_analytics)
 
     def update_analytics(self):
-        d = self.telemetry.data
-        t = np.array(d["time"])
-        alt = np.array(d["Alt"])
-        p = np.array(d["P"])
-        temp = np.array(d["T"])
-        accel = np.array(d["Accel"])
-        gyro = np.array(d["Gyro"])
         stats = []
-        if len(alt) > 3:
-            stats.append(f"Altitude: min={alt.min():.2f}, max={alt.max():.2f}, avg={alt.mean():.2f}, avg(10s)={np.mean(alt[-20:]):.2f}")
-        if len(p) > 3:
-            stats.append(f"Pressure: min={p.min():.2f}, max={p.max():.2f}, avg={p.mean():.2f}, avg(10s)={np.mean(p[-20:]):.2f}")
-        if len(temp) > 3:
-            stats.append(f"Temp: min={temp.min():.2f}, max={temp.max():.2f}, avg={temp.mean():.2f}, avg(10s)={np.mean(temp[-20:]):.2f}")
-        if len(accel) > 3:
-            stats.append(f"Accel: min={accel.min():.2f}, max={accel.max():.2f}, avg={accel.mean():.2f}, avg(10s)={np.mean(accel[-20:]):.2f}")
-        if len(gyro) > 3:
-            stats.append(f"Gyro: min={gyro.min():.2f}, max={gyro.max():.2f}, avg={gyro.mean():.2f}, avg(10s)={np.mean(gyro[-20:]):.2f}")
+        for name, key in (("Altitude", "Alt"), ("Pressure", "P"), ("Temp", "T"), ("Accel", "Accel"), ("Gyro", "Gyro")):
+            # Whole-session statistics from the downsampled history levels
+            w = self.telemetry.get_window(key, points=self.STAT_POINTS)
+            if w.n.sum() > 3:
+                recent = self.telemetry.get_window(key, t0=w.t[-1] - 10.0, points=self.STAT_POINTS)
+                stats.append(f"{name}: min={np.nanmin(w.min):.2f}, max={np.nanmax(w.max):.2f}, avg={self._mean(w):.2f}, avg(10s)={self._mean(recent):.2f}")
         self.stats_text.delete("1.0", tk.END)
         self.stats_text.insert(tk.END, "\n".join(stats) + "\n")
-        self.stats_text.insert(tk.END, "Total Samples: {}\n".format(len(t)))
+        self.stats_text.insert(tk.END, "Total Samples: {}\n".format(self.telemetry.packet_count))
+        # Detector rules: state, trips and evaluation cost
+        health = self.telemetry.get_health()
+        self.stats_text.insert(tk.END, "\nDetectors: {}\n".format(health["status"].upper()))
+        for r in health["rules"]:
+            state = "ACTIVE" if r["active"] else "ok"
+            self.stats_text.insert(tk.END, "  {:<16} {:<6} trips={:<4} evals={:<8} {:7.0f} ns/eval\n".format(
+                r["name"], state, r["trips"], r["evals"], r["mean_ns"]))
         # Mission time
         elapsed = int(time.time() - self.start_time)
         m, s = divmod(elapsed, 60)
@@ -61,6 +59,12 @@ class AnalyticsPage(tk.Frame):
         self.time_label.config(text=f"Mission Elapsed Time: {h:02d}:{m:02d}:{s:02d}")
         self.after(1200, self.update_analytics)
 
+    @staticmethod
+    def _mean(w):
+        # Rows mix history levels; weight each by the finite samples it covers
+        ok = w.n > 0
+        return float((w.mean[ok] * w.n[ok]).sum() / w.n[ok].sum()) if ok.any() else float("nan")
+
     def save_analytics(self):
         from tkinter import filedialog
         filename = filedialog.asksaveasfilename(defaultextension=".txt")
@@ -0,0 +1,326 @@
+# analyze_flight.py
+# --------------------------------------------------------------------------
+#  Post-flight analysis of a recorded flight log (see recorder.py)
+#  © 2025  Arbalest Rocketry
+# --------------------------------------------------------------------------
+#
+#  Memory-maps the log and computes a vectorized flight report: apogee,
+#  time to apogee, max acceleration, per-phase vertical speeds, drogue/main
+#  descent rates, GPS drift and per-channel statistics. Writes report.json
+#  and PNG plots into the output directory.
+#
+#  Usage:  python analyze_flight.py flight.gsr -o flight_report [--no-plots]
+#          (compressed .gsz logs are read the same way)
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from recorder import open_flight
+
+LIFTOFF_SPEED = 15.0        # m/s vertical speed that marks liftoff
+LANDED_SPEED = 2.0          # m/s below which the vehicle counts as still
+MAIN_DECEL = 5.0            # m/s² deceleration during descent that marks main deploy
+EARTH_RADIUS = 6371000.0
+PLOT_POINTS = 5000
+MAX_GRID = 2_000_000        # cap on derivative grid points (~6 h at 100 Hz)
+
+
+def smooth(x, n):
+    """Centered moving average over n samples (edges use the available samples).
+
+    ``x`` must be finite: one NaN in the running sum would spread to every
+    later value.
+    """
+    if n <= 1 or len(x) < n:
+        return np.asarray(x, dtype=float)
+    c = np.concatenate(([0.0], np.cumsum(x)))
+    lo = np.clip(np.arange(len(x)) - n // 2, 0, len(x))
+    hi = np.clip(lo + n, 0, len(x))
+    lo = hi - n
+    return (c[hi] - c[lo]) / n
+
+
+def derivative(t, x, window_s=0.5):
+    """Smoothed dx/dt at each timestamp.
+
+    Computed on a uniform grid at the mean sample interval, which keeps the
+    derivative well-defined when receive timestamps bunch up (the median
+    interval is then microseconds). Non-finite samples are skipped.
+    """
+    out = np.zeros(len(t))
+    ok = np.isfinite(x)
+    if ok.sum() < 3:
+        return out
+    tt, x = t[ok], x[ok]
+    span = tt[-1] - tt[0]
+    if span <= 0:
+        return out
+    dt = max(span / (len(tt) - 1), span / MAX_GRID)
+    grid = tt[0] + dt * np.arange(int(span / dt) + 1)
+    if len(grid) < 3:
+        return out
+    n = max(1, int(round(window_s / dt)))
+    dxdt = smooth(np.gradient(smooth(np.interp(grid, tt, x), n), dt), n)
+    return np.interp(t, grid, dxdt)
+
+
+def haversine(lat0, lon0, lat, lon):
+    """Great-circle distance (m) from (lat0, lon0) to each (lat, lon)."""
+    p0, p = np.radians(lat0), np.radians(lat)
+    dp, dl = p - p0, np.radians(lon - lon0)
+    a = np.sin(dp / 2) ** 2 + np.cos(p0) * np.cos(p) * np.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def first_index(mask, start=0):
+    """First True index at or after ``start``, or None."""
+    hits = np.flatnonzero(mask[start:])
+    return start + int(hits[0]) if hits.size else None
+
+
+def _seg(v):
+    v = v[np.isfinite(v)]
+    if not v.size:
+        return None
+    return {"mean": float(v.mean()), "min": float(v.min()), "max": float(v.max())}
+
+
+def finite_series(log, name):
+    """(t, v) of a channel without NaN/inf samples (the recorder stores NaN readings)."""
+    t, v = log.series(name)
+    ok = np.isfinite(v)
+    return (t, v) if ok.all() else (t[ok], v[ok])
+
+
+def gps_fixes(log):
+    """(t, lat, lon) of valid fixes; Lat and Lon are paired on equal timestamps."""
+    t_lat, lat = log.series("Lat")
+    t_lon, lon = log.series("Lon")
+    t, i, j = np.intersect1d(t_lat, t_lon, assume_unique=False, return_indices=True)
+    lat, lon = lat[i], lon[j]
+    ok = np.isfinite(lat) & np.isfinite(lon) & ((lat != 0) | (lon != 0))
+    return t[ok], lat[ok], lon[ok]
+
+
+# ────────────────────────────────────────────────────────────────────────────
+def channel_stats(log):
+    stats = {}
+    for name in log.channels:
+        t, v = log.series(name)
+        finite = v[np.isfinite(v)]
+        entry = {"samples": int(len(v)), "nan": int(len(v) - len(finite))}
+        if finite.size:
+            entry.update(min=float(finite.min()), max=float(finite.max()),
+                         mean=float(finite.mean()), std=float(finite.std()))
+        if len(t) > 1:
+            entry.update(first=float(t[0]), last=float(t[-1]),
+                         rate_hz=float((len(t) - 1) / (t[-1] - t[0])) if t[-1] > t[0] else None)
+        stats[name] = entry
+    return stats
+
+
+def flight_profile(t, alt, accel_t=None, accel=None):
+    """Phase boundaries, apogee and descent rates from the altitude channel."""
+    report = {}
+    if len(t) < 3:
+        return report, {}
+    vs = derivative(t, alt)
+    acc = derivative(t, vs)
+    marks = {}
+
+    lift = first_index(vs > LIFTOFF_SPEED)
+    if lift is None:
+        report["note"] = "no liftoff detected"
+        return report, marks
+    # walk back to where the climb started
+    still = np.flatnonzero(vs[:lift] < LANDED_SPEED)
+    lift = int(still[-1]) if still.size else lift
+    marks["liftoff"] = lift
+
+    apo = lift + int(np.argmax(alt[lift:]))
+    marks["apogee"] = apo
+    burn = first_index(acc < 0, lift)
+    if burn is not None and burn < apo:
+        marks["burnout"] = burn
+
+    moving = np.abs(vs) >= LANDED_SPEED
+    land = None
+    after = np.flatnonzero(moving[apo:])
+    if after.size and apo + after[-1] + 1 < len(t):
+        land = apo + int(after[-1]) + 1
+        marks["landing"] = land
+
+    pad_alt = float(np.median(alt[:lift + 1]))
+    report.update(
+        liftoff_time=float(t[lift]),
+        pad_altitude=pad_alt,
+        apogee_m=float(alt[apo]),
+        apogee_agl_m=float(alt[apo] - pad_alt),
+        apogee_time=float(t[apo]),
+        time_to_apogee_s=float(t[apo] - t[lift]),
+        max_vertical_speed=float(vs[lift:apo + 1].max()),
+        max_accel_from_alt=float(acc[lift:apo + 1].max()),
+    )
+    if accel is not None and len(accel):
+        finite = np.isfinite(accel)
+        k = int(np.argmax(np.where(finite, np.abs(accel), -np.inf)))
+        report.update(max_accel=float(accel[k]), max_accel_time=float(accel_t[k]))
+    if "burnout" in marks:
+        report["burnout_time_s"] = float(t[marks["burnout"]] - t[lift])
+    if land is not None:
+        report.update(landing_time=float(t[land]), flight_time_s=float(t[land] - t[lift]))
+
+    # Per-phase vertical speed
+    edges = [("boost", lift, marks.get("burnout", apo)),
+             ("coast", marks.get("burnout", apo), apo),
+             ("descent", apo, land if land is not None else len(t))]
+    report["phases"] = {name: dict(duration_s=float(t[min(b, len(t) - 1)] - t[a]),
+                                   vertical_speed=_seg(vs[a:b]))
+                        for name, a, b in edges if b > a}
+
+    # Drogue/main split: the sharpest deceleration while descending
+    end = land if land is not None else len(t)
+    if end - apo > 10:
+        k = apo + int(np.argmax(acc[apo:end]))
+        if acc[k] > MAIN_DECEL:
+            marks["main"] = k
+            # skip transients around each event when measuring steady rates
+            pad_n = max(1, (end - apo) // 50)
+            report["main_deploy_time"] = float(t[k])
+            report["main_deploy_altitude_m"] = float(alt[k])
+            report["drogue_descent_rate"] = float(np.median(vs[apo + pad_n:max(k - pad_n, apo + pad_n + 1)]))
+            report["main_descent_rate"] = float(np.median(vs[min(k + pad_n, end - 1):end]))
+        else:
+            report["descent_rate"] = float(np.median(vs[apo:end]))
+    return report, dict(marks, vs=vs)
+
+
+def gps_drift(log, liftoff_time=None):
+    t, lat, lon = gps_fixes(log)
+    if not len(t):
+        return None
+    pad = t <= liftoff_time if liftoff_time is not None else np.zeros(len(t), bool)
+    pad[0] = True
+    lat0, lon0 = float(np.median(lat[pad])), float(np.median(lon[pad]))
+    dist = haversine(lat0, lon0, lat, lon)
+    dy = np.radians(lat[-1] - lat0)
+    dx = np.radians(lon[-1] - lon0) * np.cos(np.radians(lat0))
+    return {
+        "pad": [lat0, lon0],
+        "pad_jitter_rms_m": float(np.sqrt(np.mean(dist[pad] ** 2))),
+        "max_distance_m": float(dist.max()),
+        "final_distance_m": float(dist[-1]),
+        "final_bearing_deg": float(np.degrees(np.arctan2(dx, dy)) % 360.0),
+        "fixes": int(len(t)),
+    }
+
+
+def analyze(path):
+    started = time.perf_counter()
+    log = open_flight(path)
+    t, alt = finite_series(log, "Alt")
+    accel_t, accel = log.series("Accel")
+    profile, marks = flight_profile(t, alt, accel_t, accel)
+    report = {
+        "file": os.path.abspath(path),
+        "records": len(log),
+        "span": list(log.span()),
+        "flight": profile,
+        "gps": gps_drift(log, profile.get("liftoff_time")),
+        "channels": channel_stats(log),
+    }
+    report["analysis_s"] = time.perf_counter() - started
+    return report, log, marks
+
+
+# ────────────────────────────────────────────────────────────────────────────
+def _decimate(*arrays, points=PLOT_POINTS):
+    step = max(1, len(arrays[0]) // points)
+    return [a[::step] for a in arrays]
+
+
+def write_plots(log, marks, out_dir):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    t, alt = finite_series(log, "Alt")       # the arrays the marks index into
+    paths = []
+    views = [("altitude.png", 0, len(t))]
+    if "liftoff" in marks:
+        # Second view of just the flight, padded by a few seconds either side
+        i = int(np.searchsorted(t, t[marks["liftoff"]] - 10.0))
+        j = int(np.searchsorted(t, t[marks.get("landing", len(t) - 1)] + 10.0))
+        views.append(("flight.png", i, j))
+    for filename, i, j in views:
+        if j - i < 2:
+            continue
+        t0 = t[i]
+        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 6), sharex=True)
+        td, ad = _decimate(t[i:j] - t0, alt[i:j])
+        ax1.plot(td, ad, linewidth=1)
+        ax1.set_ylabel("Alt (m)")
+        if "vs" in marks:
+            td, vd = _decimate(t[i:j] - t0, marks["vs"][i:j])
+            ax2.plot(td, vd, linewidth=1)
+        ax2.set_ylabel("Vertical speed (m/s)")
+        ax2.set_xlabel("t (s)")
+        for name in ("liftoff", "burnout", "apogee", "main", "landing"):
+            if name in marks and i <= marks[name] < j:
+                for ax in (ax1, ax2):
+                    ax.axvline(t[marks[name]] - t0, color="gray", linestyle="--", linewidth=0.8)
+                ax1.annotate(name, (t[marks[name]] - t0, alt[marks[name]]), fontsize=8)
+        fig.tight_layout()
+        paths.append(os.path.join(out_dir, filename))
+        fig.savefig(paths[-1], dpi=120)
+        plt.close(fig)
+
+    _, lat, lon = gps_fixes(log)
+    if len(lat):
+        fig, ax = plt.subplots(figsize=(6, 6))
+        la, lo = _decimate(lat, lon)
+        ax.plot(lo, la, linewidth=1)
+        ax.plot(lo[:1], la[:1], "go", label="start")
+        ax.plot(lo[-1:], la[-1:], "rx", label="end")
+        ax.set_xlabel("Lon")
+        ax.set_ylabel("Lat")
+        ax.legend()
+        fig.tight_layout()
+        paths.append(os.path.join(out_dir, "gps.png"))
+        fig.savefig(paths[-1], dpi=120)
+        plt.close(fig)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Post-flight analysis of a recorded flight log")
+    parser.add_argument("log", help="flight log written by the recorder (.gsr or .gsz)")
+    parser.add_argument("-o", "--out", default="flight_report", help="output directory")
+    parser.add_argument("--no-plots", action="store_true")
+    args = parser.parse_args(argv)
+
+    report, log, marks = analyze(args.log)
+    os.makedirs(args.out, exist_ok=True)
+    if not args.no_plots:
+        report["plots"] = write_plots(log, marks, args.out)
+    with open(os.path.join(args.out, "report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+
+    fl = report["flight"]
+    print(f"{report['records']} records analysed in {report['analysis_s']:.2f} s")
+    if "apogee_agl_m" in fl:
+        print(f"Apogee {fl['apogee_agl_m']:.1f} m AGL, {fl['time_to_apogee_s']:.1f} s after liftoff")
+    elif "note" in fl:
+        print(fl["note"])
+    if report["gps"]:
+        print(f"GPS drift {report['gps']['final_distance_m']:.0f} m "
+              f"(bearing {report['gps']['final_bearing_deg']:.0f}°)")
+    print(f"Report written to {os.path.join(args.out, 'report.json')}")
+
+
+if __name__ == "__main__":
+    main()
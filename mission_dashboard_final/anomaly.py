@@ -0,0 +1,351 @@
+# anomaly.py
+# --------------------------------------------------------------------------
+#  Streaming rule-based anomaly and fault detection for the ingest path
+#  © 2025  Arbalest Rocketry
+# --------------------------------------------------------------------------
+#
+#  Rules are declared in JSON (see detector_rules.json), one object each:
+#    {"type": "stale",   "channel": "Alt", "max_age": 2.0}
+#    {"type": "range",   "channel": "Alt", "min": -500, "max": 15000, "clear_margin": 10}
+#    {"type": "rate",    "channel": "Alt", "max_rate": 500, "min_dt": 0.1}
+#    {"type": "stuck",   "channel": "P",   "count": 500, "tolerance": 0.0}
+#    {"type": "invalid", "channel": "*",   "max_count": 5, "window": 10.0}
+#  Optional keys: "name", "severity" ("warn" or "fault", default "warn") and
+#  "hold" (seconds the condition must stay false before the alarm clears;
+#  1 s for range and stuck rules, 0 for the others).
+#
+#  Every rule does O(1) work per sample. A rule raises an alarm when its
+#  condition starts to hold and clears it once the condition has stopped
+#  for ``hold`` seconds, so a reading hovering at a limit does not flood
+#  the event log with raise/clear pairs.
+
+import json
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+SEVERITIES = ("ok", "warn", "fault")
+
+
+class Rule:
+    """Base class; subclasses implement ``_test`` for one sample."""
+
+    kind = ""
+    hold = 0.0                  # default clear delay (s)
+
+    def __init__(self, channel: str, name: Optional[str] = None, severity: str = "warn",
+                 hold: Optional[float] = None):
+        if severity not in SEVERITIES[1:]:
+            raise ValueError(f"unknown severity {severity!r}")
+        self.channel = channel
+        self.name = name or f"{self.kind}:{channel}"
+        self.severity = severity
+        if hold is not None:
+            self.hold = hold
+        self.active = False
+        self.message = ""
+        self.trips = 0
+        self.evals = 0
+        self.cost_ns = 0
+        self._clear_since: Optional[float] = None
+
+    def feed(self, t: float, v: float) -> Optional[str]:
+        """Evaluate one sample; return an event message on raise/clear transitions."""
+        self.evals += 1
+        problem = self._test(t, v)
+        if not problem and self.active and self.hold:
+            if self._clear_since is None:
+                self._clear_since = t
+            if t - self._clear_since < self.hold:
+                return None                     # not clear for long enough yet
+        self._clear_since = None
+        return self._set(problem)
+
+    def _test(self, t: float, v: float) -> Optional[str]:
+        raise NotImplementedError
+
+    def _set(self, problem: Optional[str]) -> Optional[str]:
+        if problem and not self.active:
+            self.active, self.message = True, problem
+            self.trips += 1
+            return f"{self.severity.upper()} {self.name}: {problem}"
+        if not problem and self.active:
+            self.active, self.message = False, ""
+            return f"CLEARED {self.name}"
+        if problem:
+            self.message = problem
+        return None
+
+    def reset(self):
+        self.active = False
+        self.message = ""
+        self._clear_since = None
+
+    def stats(self) -> Dict[str, object]:
+        return {"name": self.name, "type": self.kind, "channel": self.channel,
+                "severity": self.severity, "active": self.active, "message": self.message,
+                "trips": self.trips, "evals": self.evals,
+                "mean_ns": self.cost_ns / self.evals if self.evals else 0.0}
+
+
+class StaleRule(Rule):
+    """Watchdog: no sample for ``max_age`` seconds (armed by the first sample)."""
+
+    kind = "stale"
+
+    def __init__(self, channel, max_age: float = 2.0, **kw):
+        super().__init__(channel, **kw)
+        self.max_age = max_age
+        self.last: Optional[float] = None
+
+    def _test(self, t, v):
+        self.last = t
+        return None
+
+    def check(self, now: float) -> Optional[str]:
+        self.evals += 1
+        if self.last is None:
+            return None
+        age = now - self.last
+        return self._set(f"no data for {age:.1f} s" if age > self.max_age else None)
+
+    def reset(self):
+        super().reset()
+        self.last = None
+
+
+class RangeRule(Rule):
+    """Value outside [min, max]; once raised, it must come back inside by ``clear_margin`` to clear."""
+
+    kind = "range"
+    hold = 1.0
+
+    def __init__(self, channel, min: float = float("-inf"), max: float = float("inf"),
+                 clear_margin: float = 0.0, **kw):
+        super().__init__(channel, **kw)
+        self.lo, self.hi = min, max
+        self.clear_margin = clear_margin
+
+    def _test(self, t, v):
+        if v < self.lo or v > self.hi:
+            return f"{v:.3g} outside [{self.lo:g}, {self.hi:g}]"
+        if self.active and (v < self.lo + self.clear_margin or v > self.hi - self.clear_margin):
+            return self.message                 # back inside, but not by the margin yet
+        return None
+
+
+class RateRule(Rule):
+    """Rate-of-change limit; every sample is measured against the newest one at least ``min_dt`` seconds old.
+
+    Packets drained in one batch carry receive times microseconds apart, so
+    consecutive samples would turn sensor noise into huge rates. The
+    candidate references younger than ``min_dt`` wait in a deque, so each
+    sample costs amortised O(1).
+    """
+
+    kind = "rate"
+
+    def __init__(self, channel, max_rate: float, min_dt: float = 0.1, **kw):
+        super().__init__(channel, **kw)
+        self.max_rate = max_rate
+        self.min_dt = min_dt
+        self.refs: deque = deque()          # (t, v), oldest first
+
+    def _test(self, t, v):
+        if v != v:
+            return self.message or None         # a NaN says nothing about the rate
+        refs = self.refs
+        if refs and t < refs[-1][0]:
+            refs.clear()                        # clock went backwards; start over
+        # Drop references once a newer one is also old enough
+        while len(refs) > 1 and t - refs[1][0] >= self.min_dt:
+            refs.popleft()
+        refs.append((t, v))
+        t0, v0 = refs[0]
+        if t - t0 < self.min_dt:
+            return self.message or None         # hold the verdict until a reference ages
+        rate = abs(v - v0) / (t - t0)
+        if rate > self.max_rate:
+            return f"changing {rate:.3g}/s (limit {self.max_rate:g}/s)"
+        return None
+
+    def reset(self):
+        super().reset()
+        self.refs.clear()
+
+
+class StuckRule(Rule):
+    """Stuck sensor: ``count`` consecutive samples within ``tolerance`` of each other.
+
+    Once raised, a single glitch does not clear it: the values have to keep
+    changing for ``hold`` seconds.
+    """
+
+    kind = "stuck"
+    hold = 1.0
+
+    def __init__(self, channel, count: int = 500, tolerance: float = 0.0, **kw):
+        super().__init__(channel, **kw)
+        self.count = count
+        self.tolerance = tolerance
+        self.ref: Optional[float] = None
+        self.run = 0
+
+    def _test(self, t, v):
+        if self.ref is not None and abs(v - self.ref) <= self.tolerance:
+            self.run += 1
+        else:
+            self.ref, self.run = v, 1
+        if self.run >= self.count:
+            return f"stuck at {self.ref:.6g} for {self.run} samples"
+        if self.active and self.run > 1:
+            return self.message                 # repeating again after a glitch
+        return None
+
+    def reset(self):
+        super().reset()
+        self.ref, self.run = None, 0
+
+
+class InvalidRule(Rule):
+    """NaN values and garbled tokens: more than ``max_count`` within ``window`` seconds.
+
+    Channel ``"*"`` also counts garbled tokens. Each bad sample is pushed
+    and popped once, so the sliding count is amortised O(1).
+    """
+
+    kind = "invalid"
+
+    def __init__(self, channel, max_count: int = 5, window: float = 10.0, **kw):
+        super().__init__(channel, **kw)
+        self.max_count = max_count
+        self.window = window
+        self.bad = deque()
+        self.total = 0
+
+    def _test(self, t, v):
+        if v != v:
+            self.bad.append(t)
+            self.total += 1
+        return self._verdict(t)
+
+    def garbled(self, t: float, n: int) -> Optional[str]:
+        self.evals += 1
+        self.bad.extend([t] * n)
+        self.total += n
+        return self._set(self._verdict(t))
+
+    def _verdict(self, t):
+        while self.bad and self.bad[0] < t - self.window:
+            self.bad.popleft()
+        if len(self.bad) > self.max_count:
+            return f"{len(self.bad)} invalid values in {self.window:g} s ({self.total} total)"
+        return None
+
+    def reset(self):
+        super().reset()
+        self.bad.clear()
+
+
+RULE_TYPES = {cls.kind: cls for cls in (StaleRule, RangeRule, RateRule, StuckRule, InvalidRule)}
+
+
+def build_rules(config: Sequence[Dict[str, object]]) -> List[Rule]:
+    rules = []
+    for entry in config:
+        entry = dict(entry)
+        kind = entry.pop("type", None)
+        if kind not in RULE_TYPES:
+            raise ValueError(f"unknown detector rule type {kind!r}")
+        rules.append(RULE_TYPES[kind](**entry))
+    return rules
+
+
+class DetectorEngine:
+    """Runs rules over each ingest batch and tracks overall health."""
+
+    def __init__(self, rules: Sequence[Rule] = ()):
+        self.rules = list(rules)
+        self.by_channel: Dict[str, List[Rule]] = {}
+        self.wildcard: List[Rule] = []
+        self.stale = [r for r in self.rules if isinstance(r, StaleRule)]
+        self.garbled = [r for r in self.rules if isinstance(r, InvalidRule) and r.channel == "*"]
+        for rule in self.rules:
+            if rule.channel == "*":
+                self.wildcard.append(rule)
+            else:
+                self.by_channel.setdefault(rule.channel, []).append(rule)
+        self._dispatch: Dict[str, Tuple[List[Rule], List[StaleRule]]] = {}
+        self.numeric = set()            # fields that have carried numbers
+
+    @classmethod
+    def from_config(cls, path: str) -> "DetectorEngine":
+        with open(path) as f:
+            return cls(build_rules(json.load(f)))
+
+    def _rules_for(self, key):
+        # (sample rules, watchdogs) for a field, cached so dispatch is one dict lookup
+        entry = self._dispatch.get(key)
+        if entry is None:
+            rules = self.by_channel.get(key, []) + self.wildcard
+            entry = self._dispatch[key] = ([r for r in rules if not isinstance(r, StaleRule)],
+                                           [r for r in rules if isinstance(r, StaleRule)])
+        return entry
+
+    def process(self, batch: Sequence[Tuple[float, Dict[str, object], int]]) -> List[Tuple[float, str]]:
+        """Feed (t, packet, garbled_token_count) rows; return (t, message) events."""
+        events = []
+        for t, pkt, garbled in batch:
+            for key, v in pkt.items():
+                if not isinstance(v, float):
+                    if key in self.numeric:
+                        garbled += 1    # e.g. "Alt:12.3x" on a numeric channel
+                    continue
+                self.numeric.add(key)
+                rules, watchdogs = self._rules_for(key)
+                for rule in watchdogs:
+                    rule.last = t
+                for rule in rules:
+                    start = time.perf_counter_ns()
+                    msg = rule.feed(t, v)
+                    rule.cost_ns += time.perf_counter_ns() - start
+                    if msg:
+                        events.append((t, msg))
+            if garbled:
+                for rule in self.garbled:
+                    start = time.perf_counter_ns()
+                    msg = rule.garbled(t, garbled)
+                    rule.cost_ns += time.perf_counter_ns() - start
+                    if msg:
+                        events.append((t, msg))
+        return events
+
+    def check(self, now: float) -> List[Tuple[float, str]]:
+        """Run the stale-data watchdogs; call periodically, including when idle."""
+        events = []
+        for rule in self.stale:
+            start = time.perf_counter_ns()
+            msg = rule.check(now)
+            rule.cost_ns += time.perf_counter_ns() - start
+            if msg:
+                events.append((now, msg))
+        return events
+
+    def status(self) -> str:
+        level = 0
+        for rule in self.rules:
+            if rule.active:
+                level = max(level, SEVERITIES.index(rule.severity))
+        return SEVERITIES[level]
+
+    def health(self) -> Dict[str, object]:
+        return {
+            "status": self.status(),
+            "active": [f"{r.name}: {r.message}" for r in self.rules if r.active],
+            "rules": [r.stats() for r in self.rules],
+        }
+
+    def reset(self):
+        for rule in self.rules:
+            rule.reset()
+        self.numeric.clear()
@@ -0,0 +1,126 @@
+# bench_codec.py
+# --------------------------------------------------------------------------
+#  Compression ratio and throughput of the telemetry codec on recorded
+#  flight logs
+#  © 2025  Arbalest Rocketry
+# --------------------------------------------------------------------------
+#
+#  Every channel of each log is encoded and decoded in BLOCK_SIZE blocks.
+#  Each round trip is checked for exact values and 1 µs timestamps. Sizes
+#  are compared with the raw .gsr records (18 bytes per sample); MB/s
+#  figures are raw record megabytes per second of encode or decode time.
+#
+#  FlightRecorder writes one small block per channel per flush instead, so
+#  the "as recorded" line gives what a recording really costs: the file
+#  size of a .gsz log, or a .gsr log re-chunked into --flush-interval
+#  flushes the way the recorder would have written it.
+#
+#  Usage:  python bench_codec.py flight.gsr [more logs ...] [--repeat 3] [--json out.json]
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from codec import BLOCK_SIZE, decode_series, encode_series
+from recorder import RECORD_DTYPE, CompressedFlightLog, _encode_chunks, open_flight
+
+
+def _best(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_channel(t, v, repeat=3, block=BLOCK_SIZE):
+    raw = len(t) * RECORD_DTYPE.itemsize
+    enc_s, buf = _best(lambda: encode_series(t, v, block), repeat)
+    dec_s, (t2, v2) = _best(lambda: decode_series(buf), repeat)
+    if not np.array_equal(np.asarray(v).view(np.uint64), v2.view(np.uint64)):
+        raise AssertionError("values did not round-trip")
+    if len(t) and np.abs(t2 - t).max() > 1e-6:
+        raise AssertionError("timestamps off by more than 1 µs")
+    return {
+        "samples": len(t),
+        "raw_bytes": raw,
+        "encoded_bytes": len(buf),
+        "ratio": raw / len(buf) if buf else 0.0,
+        "bytes_per_sample": len(buf) / len(t) if len(t) else 0.0,
+        "encode_mb_s": raw / enc_s / 1e6 if enc_s else 0.0,
+        "decode_mb_s": raw / dec_s / 1e6 if dec_s else 0.0,
+    }
+
+
+def recorded_bytes(log, flush_interval=1.0):
+    """Compressed size of the log as FlightRecorder writes it (one block per channel per flush)."""
+    if isinstance(log, CompressedFlightLog):
+        return os.path.getsize(log.path)
+    rows = log.records
+    if not len(rows):
+        return 0
+    flush = np.floor((rows["t"] - rows["t"][0]) / flush_interval)
+    bounds = np.flatnonzero(np.diff(flush)) + 1
+    return sum(len(_encode_chunks(np.asarray(chunk))) for chunk in np.split(rows, bounds))
+
+
+def bench_log(path, repeat=3, block=BLOCK_SIZE, flush_interval=1.0):
+    log = open_flight(path)
+    channels = {}
+    for name in log.channels:
+        t, v = log.series(name)
+        t, v = np.ascontiguousarray(t), np.ascontiguousarray(v)
+        if len(t):
+            channels[name] = bench_channel(t, v, repeat, block)
+    raw = sum(c["raw_bytes"] for c in channels.values())
+    enc = sum(c["encoded_bytes"] for c in channels.values())
+    enc_s = sum(c["raw_bytes"] / c["encode_mb_s"] for c in channels.values() if c["encode_mb_s"]) / 1e6
+    dec_s = sum(c["raw_bytes"] / c["decode_mb_s"] for c in channels.values() if c["decode_mb_s"]) / 1e6
+    recorded = recorded_bytes(log, flush_interval)
+    return {
+        "path": path,
+        "channels": channels,
+        "raw_bytes": raw,
+        "encoded_bytes": enc,
+        "ratio": raw / enc if enc else 0.0,
+        "encode_mb_s": raw / enc_s / 1e6 if enc_s else 0.0,
+        "decode_mb_s": raw / dec_s / 1e6 if dec_s else 0.0,
+        "recorded_bytes": recorded,
+        "recorded_ratio": raw / recorded if recorded else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the telemetry codec on recorded flight logs")
+    parser.add_argument("logs", nargs="+", help="flight logs (.gsr or .gsz)")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per channel (best is kept)")
+    parser.add_argument("--block", type=int, default=BLOCK_SIZE, help="samples per codec block")
+    parser.add_argument("--flush-interval", type=float, default=1.0,
+                        help="recorder flush period (s) used to re-chunk .gsr logs for the as-recorded size")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for path in args.logs:
+        res = bench_log(path, args.repeat, args.block, args.flush_interval)
+        results.append(res)
+        print(f"{path}")
+        print(f"  {'channel':<10} {'samples':>10} {'B/sample':>9} {'ratio':>7} {'enc MB/s':>9} {'dec MB/s':>9}")
+        for name, c in res["channels"].items():
+            print(f"  {name:<10} {c['samples']:>10} {c['bytes_per_sample']:>9.2f} {c['ratio']:>7.2f} "
+                  f"{c['encode_mb_s']:>9.1f} {c['decode_mb_s']:>9.1f}")
+        print(f"  {'total':<10} {res['raw_bytes'] / 1e6:>8.1f}MB -> {res['encoded_bytes'] / 1e6:.1f} MB, "
+              f"ratio {res['ratio']:.2f}, encode {res['encode_mb_s']:.1f} MB/s, decode {res['decode_mb_s']:.1f} MB/s")
+        print(f"  {'recorded':<10} {res['raw_bytes'] / 1e6:>8.1f}MB -> {res['recorded_bytes'] / 1e6:.1f} MB, "
+              f"ratio {res['recorded_ratio']:.2f} (one block per channel per flush)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# channels.py
+# --------------------------------------------------------------------------
+#  Per-channel timestamped sample storage and uniform-grid resampling
+#  © 2025  Arbalest Rocketry
+# --------------------------------------------------------------------------
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from history import HistoryPyramid, Window
+
+RESAMPLE_METHODS = ("hold", "linear")
+
+
+class Channel:
+    """History of one telemetry field; every sample keeps its own timestamp.
+
+    The last ``maxlen`` samples are kept at full resolution; older data
+    lives on in the downsampled levels of a ``HistoryPyramid``.
+    """
+
+    def __init__(self, name: str, maxlen: int = 1000):
+        self.name = name
+        self.history = HistoryPyramid(recent=maxlen)
+
+    @property
+    def count(self) -> int:
+        """Samples ever appended (survives eviction from the recent window)."""
+        return self.history.count
+
+    def append(self, t: float, v: float):
+        self.history.append(t, v)
+
+    def last(self) -> Optional[Tuple[float, float]]:
+        return self.history.last()
+
+    def span(self) -> Optional[Tuple[float, float]]:
+        """Earliest and latest timestamp still held at any history level."""
+        return self.history.span()
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return full-resolution (timestamps, values) of the recent window."""
+        return self.history.recent()
+
+    def since(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Full-resolution samples appended after the first ``count`` (recent window only)."""
+        raw = self.history.levels[0]
+        n = min(max(self.count - count, 0), raw.size)
+        rows = raw.rows(raw.size - n, raw.size)
+        return rows[:, 0], rows[:, 1]
+
+    def values(self) -> List[float]:
+        return self.history.recent()[1].tolist()
+
+    def query(self, t0: Optional[float] = None, t1: Optional[float] = None,
+              points: int = 1000) -> Window:
+        """Return about ``points`` (t, mean, min, max) rows over [t0, t1]."""
+        return self.history.query(t0, t1, points)
+
+    def clear(self):
+        self.history.clear()
+
+    def __len__(self):
+        return self.history.levels[0].size
+
+
+def uniform_grid(t0: float, t1: float, dt: Optional[float] = None,
+                 n: Optional[int] = None) -> np.ndarray:
+    """Build a uniform time grid over [t0, t1] from a step ``dt`` or a point count ``n``."""
+    if dt is not None:
+        if dt <= 0:
+            raise ValueError("dt must be positive")
+        return t0 + dt * np.arange(int(np.floor((t1 - t0) / dt)) + 1)
+    if n is None or n < 1:
+        raise ValueError("either dt or a positive n is required")
+    return np.linspace(t0, t1, n)
+
+
+def resample(series: Dict[str, Tuple[np.ndarray, np.ndarray]], grid: np.ndarray,
+             method: str = "hold") -> Dict[str, np.ndarray]:
+    """Put every (t, v) series onto ``grid``.
+
+    ``hold`` repeats the most recent sample at or before each grid point;
+    ``linear`` interpolates between neighbouring samples and holds the final
+    value past the end. Grid points before a channel's first sample are NaN.
+    Timestamps must be sorted, which is how channels store them.
+    """
+    if method not in RESAMPLE_METHODS:
+        raise ValueError(f"unknown resample method {method!r}")
+    grid = np.asarray(grid, dtype=float)
+    out = {}
+    for name, (t, v) in series.items():
+        if len(t) == 0:
+            out[name] = np.full(grid.shape, np.nan)
+            continue
+        if method == "hold":
+            idx = np.searchsorted(t, grid, side="right") - 1
+            col = v[np.maximum(idx, 0)]
+            col[idx < 0] = np.nan
+        else:
+            col = np.interp(grid, t, v, left=np.nan, right=v[-1])
+        out[name] = col
+    return out
+
+
+def common_span(series: Iterable[Tuple[np.ndarray, np.ndarray]]) -> Optional[Tuple[float, float]]:
+    """Return the (earliest, latest) timestamp across non-empty series."""
+    starts, ends = [], []
+    for t, _ in series:
+        if len(t):
+            starts.append(t[0]); ends.append(t[-1])
+    if not starts:
+        return None
+    return min(starts), max(ends)
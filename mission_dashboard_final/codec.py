@@ -0,0 +1,197 @@
+# codec.py
+# --------------------------------------------------------------------------
+#  Compact block codec for (timestamp, value) telemetry series
+#  © 2025  Arbalest Rocketry
+# --------------------------------------------------------------------------
+#
+#  A series is cut into blocks of up to BLOCK_SIZE samples. Each block is
+#  encoded and decoded with whole-array NumPy operations, no per-sample loop.
+#
+#    header      uvarints: n, mode, timestamp bytes, value bytes
+#    timestamps  1 µs integers, zigzag, uvarint: the first timestamp, then
+#                delta-of-delta starting from the first interval
+#    values      mode 0:    Gorilla-style XOR with the previous value,
+#                           byte aligned: one control byte (leading zero
+#                           bytes << 4 | meaningful bytes) plus the bytes
+#                           in between
+#                mode 1..7: decimal values, stored as the integers
+#                           v * 10**(mode - 1), delta, zigzag, uvarint;
+#                           preceded by the count and delta-coded
+#                           positions of any -0.0 samples
+#
+#  Readings that arrive as ASCII ("Alt:123.45") almost always qualify for
+#  the decimal mode. That mode is only picked when it decodes back to the
+#  exact same float64 values. Values are lossless in both modes; timestamps
+#  are kept to 1 µs.
+
+from typing import List, Tuple
+
+import numpy as np
+
+BLOCK_SIZE = 1024
+MODE_XOR = 0
+MAX_DECIMALS = 6
+_INT_LIMIT = 2.0 ** 53
+
+_SHIFTS = np.arange(0, 70, 7, dtype=np.uint64)
+_COLS10 = np.arange(10)
+_COLS8 = np.arange(8)
+
+
+# ────────────────────────────────────────────────────────────────────────────
+def uvarint_encode(u) -> bytes:
+    """LEB128-encode an array of unsigned 64-bit integers."""
+    u = np.asarray(u, dtype=np.uint64)
+    if not u.size:
+        return b""
+    groups = ((u[:, None] >> _SHIFTS) & np.uint64(0x7F)).astype(np.uint8)
+    nbytes = 1 + (u[:, None] >= (np.uint64(1) << _SHIFTS[1:])).sum(axis=1)
+    groups[_COLS10 < (nbytes - 1)[:, None]] |= 0x80
+    return groups[_COLS10 < nbytes[:, None]].tobytes()
+
+
+def uvarint_decode(buf) -> np.ndarray:
+    """Decode every LEB128 integer in ``buf``."""
+    b = np.frombuffer(buf, dtype=np.uint8)
+    if not b.size:
+        return np.empty(0, dtype=np.uint64)
+    end = (b & 0x80) == 0
+    if not end[-1]:
+        raise ValueError("truncated varint")
+    starts = np.concatenate(([0], np.flatnonzero(end)[:-1] + 1))
+    value_of = np.cumsum(end) - end
+    pos = np.arange(b.size) - starts[value_of]
+    parts = (b & 0x7F).astype(np.uint64) << (7 * pos).astype(np.uint64)
+    return np.bitwise_or.reduceat(parts, starts)
+
+
+def read_uvarint(buf, pos: int) -> Tuple[int, int]:
+    """Decode one integer at ``pos``; return (value, next position)."""
+    value = shift = 0
+    while True:
+        if pos >= len(buf):
+            raise ValueError("truncated varint")
+        byte = int(buf[pos])
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def zigzag(n: np.ndarray) -> np.ndarray:
+    n = np.asarray(n, dtype=np.int64)
+    return ((n << 1) ^ (n >> 63)).view(np.uint64)
+
+
+def unzigzag(u: np.ndarray) -> np.ndarray:
+    u = np.asarray(u, dtype=np.uint64)
+    return ((u >> np.uint64(1)) ^ (np.uint64(0) - (u & np.uint64(1)))).view(np.int64)
+
+
+# ────────────────────────────────────────────────────────────────────────────
+def _decimal_scale(v: np.ndarray):
+    """Smallest decimal count that round-trips ``v`` exactly, as (count, ints) or None."""
+    if not np.isfinite(v).all():
+        return None
+    for k in range(MAX_DECIMALS + 1):
+        scale = 10.0 ** k
+        ints = np.round(v * scale)
+        if np.abs(ints).max() >= _INT_LIMIT:
+            return None
+        if np.array_equal(ints / scale, v):
+            return k, ints.astype(np.int64)
+    return None
+
+
+def _xor_encode(v: np.ndarray) -> bytes:
+    bits = np.ascontiguousarray(v, dtype="<f8").view(np.uint64)
+    x = bits ^ np.concatenate(([np.uint64(0)], bits[:-1]))
+    b = x.astype(">u8").view(np.uint8).reshape(-1, 8)      # most significant byte first
+    nz = b != 0
+    any_nz = nz.any(axis=1)
+    lead = np.where(any_nz, nz.argmax(axis=1), 8)
+    trail = np.where(any_nz, nz[:, ::-1].argmax(axis=1), 0)
+    length = 8 - lead - trail
+    mask = (_COLS8 >= lead[:, None]) & (_COLS8 < (lead + length)[:, None])
+    return (lead << 4 | length).astype(np.uint8).tobytes() + b[mask].tobytes()
+
+
+def _xor_decode(buf, n: int) -> np.ndarray:
+    ctrl = np.frombuffer(buf, dtype=np.uint8, count=n)
+    lead = (ctrl >> 4).astype(np.int64)
+    length = (ctrl & 0x0F).astype(np.int64)
+    mask = (_COLS8 >= lead[:, None]) & (_COLS8 < (lead + length)[:, None])
+    b = np.zeros((n, 8), dtype=np.uint8)
+    b[mask] = np.frombuffer(buf, dtype=np.uint8, offset=n)
+    x = b.view(">u8").ravel().astype(np.uint64)
+    return np.bitwise_xor.accumulate(x).view("<f8")
+
+
+def encode_block(t, v) -> bytes:
+    """Encode one block of (timestamps, values); any length, usually <= BLOCK_SIZE."""
+    t = np.asarray(t, dtype=float)
+    v = np.asarray(v, dtype=float)
+    if t.shape != v.shape or t.ndim != 1:
+        raise ValueError("t and v must be 1-D arrays of equal length")
+    t_us = np.round(t * 1e6).astype(np.int64)
+    # Absolute start once; a delta-of-delta from 0 would spend it twice
+    d = np.diff(t_us)
+    ts = uvarint_encode(zigzag(np.concatenate((t_us[:1], np.diff(d, prepend=0)))))
+
+    scaled = _decimal_scale(v) if v.size else None
+    if scaled is None:
+        mode, vals = MODE_XOR, _xor_encode(v)
+    else:
+        neg_zero = np.flatnonzero((v == 0) & np.signbit(v))
+        mode = scaled[0] + 1
+        vals = uvarint_encode(np.concatenate(([neg_zero.size], np.diff(neg_zero, prepend=0),
+                                              zigzag(np.diff(scaled[1], prepend=0)))))
+    return uvarint_encode([t.size, mode, len(ts), len(vals)]) + ts + vals
+
+
+def decode_block(buf, pos: int = 0) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Decode the block at ``pos``; return (t, v, position after the block)."""
+    n, pos = read_uvarint(buf, pos)
+    mode, pos = read_uvarint(buf, pos)
+    ts_len, pos = read_uvarint(buf, pos)
+    val_len, pos = read_uvarint(buf, pos)
+    end = pos + ts_len + val_len
+    if end > len(buf):
+        raise ValueError("truncated block")
+    dd = unzigzag(uvarint_decode(buf[pos:pos + ts_len]))
+    if dd.size != n:
+        raise ValueError("corrupt block: timestamp count mismatch")
+    if n:
+        dd[1:] = np.cumsum(dd[1:])                  # intervals
+    t = np.cumsum(dd) / 1e6
+    vals = buf[pos + ts_len:end]
+    if mode == MODE_XOR:
+        v = _xor_decode(vals, n)
+    elif mode <= MAX_DECIMALS + 1:
+        u = uvarint_decode(vals)
+        k = int(u[0]) if u.size else 0
+        v = np.cumsum(unzigzag(u[1 + k:])) / 10.0 ** (mode - 1)
+        v[np.cumsum(u[1:1 + k].astype(np.int64))] = -0.0
+    else:
+        raise ValueError(f"unknown value mode {mode}")
+    return t, v, end
+
+
+def encode_series(t, v, block: int = BLOCK_SIZE) -> bytes:
+    """Encode a whole series as consecutive blocks."""
+    return b"".join(encode_block(t[i:i + block], v[i:i + block]) for i in range(0, len(t), block))
+
+
+def decode_series(buf) -> Tuple[np.ndarray, np.ndarray]:
+    """Decode consecutive blocks back into one (t, v) series."""
+    ts: List[np.ndarray] = []
+    vs: List[np.ndarray] = []
+    pos = 0
+    while pos < len(buf):
+        t, v, pos = decode_block(buf, pos)
+        ts.append(t)
+        vs.append(v)
+    if not ts:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(ts), np.concatenate(vs)
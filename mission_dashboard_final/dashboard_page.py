@@ -4,17 +4,17 @@
 #  © 2025  Arbalest Rocketry
 # --------------------------------------------------------------------------
 import tkinter as tk
+from collections import deque
 from datetime import datetime
-from random import uniform
-from typing import Dict, Tuple, List
+from typing import Deque, Dict, Optional, Tuple, List
 
-import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from PIL import Image, ImageTk
 from tkintermapview import TkinterMapView
 
 from analog_gauge import AnalogGauge
+from derived import FlightEvents
 from telemetry_udp import Telemetry   # ← live data source
 
 # ────────────────────────────────────────────────────────────────────────────
@@ -25,12 +25,20 @@ class DashboardPage(tk.Frame):
     FG_TXT     = "#e0eefa"
     FG_ACCENT  = "#00f0ff"
 
+    # Link-health thresholds
+    LINK_STALE_S  = 2.0     # no packet for this long → LINK LOST
+    LINK_LOSS_PCT = 5.0     # sequence loss above this → DEGRADED
+    SPARK_CHARS   = "▁▂▃▄▅▆▇█"
+    TRAJECTORY_POINTS = 2000    # GPS fixes kept for the map path
+
     # ───────────────────────────────────────────────────────────────────
     def __init__(self, master, telemetry: Telemetry, user: Dict[str, str], **kwargs):
         super().__init__(master, bg=self.UI_BG, **kwargs)
         self.telemetry = telemetry
         self.user      = user
-        self.trajectory_coords: List[Tuple[float, float]] = []
+        self.trajectory_coords: Deque[Tuple[float, float]] = deque(maxlen=self.TRAJECTORY_POINTS)
+        self.map_path = None                    # one CanvasPath, updated in place
+        self._fix_time: Optional[float] = None  # timestamp of the last fix added
 
         # ===== GRID LAYOUT =================================================
         self.columnconfigure(0, weight=1)
@@ -86,7 +94,9 @@ class DashboardPage(tk.Frame):
         self.data_fields = [("Yaw (deg)", "Yaw"),
                             ("Pitch (deg)", "Pitch"),
                             ("Roll (deg)", "Roll"),
-                            ("Altitude (m)", "Alt")]
+                            ("Altitude (m)", "Alt"),
+                            ("V-Speed (m/s)", "VSpeed"),
+                            ("Phase", "Phase")]
 
         for desc, key in self.data_fields:
             row = tk.Frame(telem_panel, bg=self.UI_BG); row.pack(anchor="w")
@@ -99,6 +109,15 @@ class DashboardPage(tk.Frame):
                            width=9, anchor="w")
             lbl.pack(side="left"); self.labels[key] = lbl
 
+        # --- link-health panel ---
+        tk.Label(telem_panel, text="LINK HEALTH",
+                 font=("Consolas", 12, "bold"),
+                 fg="#fefefe", bg=self.UI_BG).pack(anchor="w", pady=(10, 0))
+        self.link_label = tk.Label(telem_panel, text="NO LINK",
+                                   font=("Consolas", 10), justify="left",
+                                   fg="#62e0e7", bg="#11212c", anchor="w")
+        self.link_label.pack(anchor="w", fill="x")
+
         # ===== MAP (right) ===============================================
         map_panel = tk.Frame(self, bg=self.UI_BG)
         map_panel.grid(row=1, column=1, sticky="nsew", padx=(2, 10))
@@ -169,51 +188,106 @@ class DashboardPage(tk.Frame):
     # ───────────────────────────────────────────────────────────────────
     def _update_loop(self):
         """Fetch the latest telemetry packet and refresh all widgets."""
+        link_status = self._update_link_health()
+        self._update_system_health(link_status)
         packet = self.telemetry.latest
         if packet is None:                    # no data yet
             self.after(200, self._update_loop)
             return
 
         # ----- gauges / numeric labels ---------------------------------
-        self.yaw_gauge.set_value(packet["Yaw"])
-        self.pitch_gauge.set_value(packet["Pitch"])
-        self.roll_gauge.set_value(packet["Roll"])
+        # Packets may carry any subset of fields, so use each channel's last sample
+        last = {key: self.telemetry.get_last(key) for _, key in self.data_fields}
+        for gauge, key in ((self.yaw_gauge, "Yaw"), (self.pitch_gauge, "Pitch"), (self.roll_gauge, "Roll")):
+            if last[key]:
+                gauge.set_value(last[key][1])
 
-        for key in ("Yaw", "Pitch", "Roll", "Alt"):
-            self.labels[key].config(text=f"{packet[key]:.2f}")
+        for key, sample in last.items():
+            if not sample:
+                continue
+            if key == "Phase":
+                self.labels[key].config(text=FlightEvents.PHASES[int(sample[1])])
+            else:
+                self.labels[key].config(text=f"{sample[1]:.2f}")
 
         # ----- event log ----------------------------------------------
         self.event_log.config(state="normal")
         self.event_log.delete("1.0", "end")
         self.event_log.insert("end",
-                              "\n".join(self.telemetry.event_log[-6:]) or "—")
+                              "\n".join(self.telemetry.get_events(6)) or "—")
         self.event_log.config(state="disabled")
 
         # ----- map + trajectory path ----------------------------------
-        lat, lon = packet["Lat"], packet["Lon"]
-        if lat and lon:
-            self.map_marker.set_position(lat, lon)
-            self.map_widget.set_position(lat, lon)
-            self.trajectory_coords.append((lat, lon))
-            if len(self.trajectory_coords) > 1:
-                self.map_widget.set_path(self.trajectory_coords, color="blue")
+        # Only new fixes extend the path; set_path would add a canvas object per call
+        lat, lon = self.telemetry.get_last("Lat"), self.telemetry.get_last("Lon")
+        if lat and lon and lat[0] == lon[0] and lat[0] != self._fix_time:
+            self._fix_time = lat[0]
+            self.map_marker.set_position(lat[1], lon[1])
+            self.map_widget.set_position(lat[1], lon[1])
+            self.trajectory_coords.append((lat[1], lon[1]))
+            if self.map_path is not None:
+                self.map_path.set_position_list(list(self.trajectory_coords))
+            elif len(self.trajectory_coords) > 1:
+                self.map_path = self.map_widget.set_path(list(self.trajectory_coords), color="blue")
 
         # ----- strip-charts -------------------------------------------
-        t_arr = np.asarray(self.telemetry.data["time"])
-        if t_arr.size >= 3:
-            for ax, line, field in zip(self.axes, self.lines, self.plot_fields):
-                y = np.asarray(self.telemetry.data[field])
+        for ax, line, field in zip(self.axes, self.lines, self.plot_fields):
+            t_arr, y = self.telemetry.get_series(field)
+            if t_arr.size >= 3:
                 line.set_data(t_arr, y)
                 ax.relim(); ax.autoscale_view()
         for c in self.canvases:
             c.draw_idle()
 
-        # ----- demo health indicator ----------------------------------
-        if uniform(0, 1) < 0.01:
-            self.sys_health.config(text="SYSTEM: FAULT", fg="#ff5555")
-            self.telemetry.add_event("SYSTEM FAULT: Watchdog triggered")
-        else:
-            self.sys_health.config(text="SYSTEM: OK", fg="#00ff6b")
-
         # schedule next update
         self.after(500, self._update_loop)
+
+    # ───────────────────────────────────────────────────────────────────
+    def _update_link_health(self) -> str:
+        """Refresh the link panel; return "waiting", "ok", "degraded" or "lost"."""
+        stats = self.telemetry.get_link_stats()
+        if not stats:
+            self.link_label.config(text="NO LINK")
+            return "waiting"
+
+        # A forwarder restart shows up as a new ip:port; the old source stays in
+        # the table but only the freshest one decides the link state.
+        fresh = min(stats, key=lambda src: stats[src]["since_last_s"])
+        lines = []
+        for src, st in sorted(stats.items(), key=lambda kv: kv[1]["since_last_s"]):
+            age  = st["since_last_s"]
+            loss = st["loss_pct"]
+            loss_txt = "n/a" if loss is None else f"{loss:.1f}%"
+            lines.append(src if src == fresh or age <= self.LINK_STALE_S else f"{src}  (idle)")
+            lines.append(f"  rate {st['rate_hz']:6.1f} Hz   loss {loss_txt:>6}   gaps {st['gaps']}")
+            lines.append(f"  jitter {st['jitter_ms']:6.1f} ms  age {age:5.1f} s")
+            lines.append(f"  jitter hist {self._sparkline(st['jitter_hist'])}")
+        self.link_label.config(text="\n".join(lines))
+
+        st = stats[fresh]
+        if st["since_last_s"] > self.LINK_STALE_S:
+            return "lost"
+        if st["loss_pct"] is not None and st["loss_pct"] > self.LINK_LOSS_PCT:
+            return "degraded"
+        return "ok"
+
+    def _update_system_health(self, link_status: str):
+        """Drive the system badge from the anomaly detectors and link state."""
+        health = self.telemetry.get_health()
+        level  = health["status"]
+        if link_status == "lost":
+            level = "fault"
+        elif link_status in ("degraded", "waiting") and level == "ok":
+            level = "warn"
+
+        if link_status == "waiting" and level == "warn":
+            text = "SYSTEM: NO DATA"
+        else:
+            text = f"SYSTEM: {level.upper()}"
+        color = {"ok": "#00ff6b", "warn": "#ffd24a", "fault": "#ff5555"}[level]
+        self.sys_health.config(text=text, fg=color)
+
+    def _sparkline(self, counts: List[int]) -> str:
+        peak = max(counts) or 1
+        top  = len(self.SPARK_CHARS) - 1
+        return "".join(self.SPARK_CHARS[round(c * top / peak)] for c in counts)
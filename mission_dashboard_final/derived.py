@@ -0,0 +1,280 @@
+# derived.py
+# --------------------------------------------------------------------------
+#  Derived-channel pipeline: quantities computed from raw telemetry in the
+#  ingest path (vertical kinematics, Euler angles, flight events)
+#  © 2025  Arbalest Rocketry
+# --------------------------------------------------------------------------
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Packet = Dict[str, object]
+
+
+def quat_to_euler(qw, qx, qy, qz):
+    """Convert unit quaternions to (roll, pitch, yaw) in radians.
+
+    Works on scalars or arrays; inputs are normalised first and zero-norm
+    quaternions produce NaN.
+    """
+    qw, qx, qy, qz = (np.asarray(q, dtype=float) for q in (qw, qx, qy, qz))
+    norm = np.sqrt(qw * qw + qx * qx + qy * qy + qz * qz)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        qw, qx, qy, qz = qw / norm, qx / norm, qy / norm, qz / norm
+    roll = np.arctan2(2 * (qw * qx + qy * qz), 1 - 2 * (qx * qx + qy * qy))
+    pitch = np.arcsin(np.clip(2 * (qw * qy - qz * qx), -1.0, 1.0))
+    yaw = np.arctan2(2 * (qw * qz + qx * qy), 1 - 2 * (qy * qy + qz * qz))
+    return roll, pitch, yaw
+
+
+class DerivedStage:
+    """Base class for a pipeline stage.
+
+    A stage declares the channels it reads (``inputs``) and writes
+    (``outputs``). ``update`` receives every packet of a batch that carries
+    all inputs, as arrays, and returns one array per output. Stages keep
+    whatever state they need between batches and may append human-readable
+    messages to ``self.events``.
+    """
+
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+
+    def __init__(self):
+        self.events: List[Tuple[float, str]] = []
+
+    def update(self, t: np.ndarray, cols: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        raise NotImplementedError
+
+    def reset(self):
+        self.events.clear()
+
+
+class EulerFromQuaternion(DerivedStage):
+    """Roll/pitch/yaw in degrees from the ``qw..qz`` attitude quaternion."""
+
+    inputs = ("qw", "qx", "qy", "qz")
+    outputs = ("QRoll", "QPitch", "QYaw")
+
+    def update(self, t, cols):
+        roll, pitch, yaw = quat_to_euler(cols["qw"], cols["qx"], cols["qy"], cols["qz"])
+        return {"QRoll": np.degrees(roll), "QPitch": np.degrees(pitch), "QYaw": np.degrees(yaw)}
+
+
+class _SlidingSlope:
+    """Least-squares slope over the last ``window`` samples, evaluated per batch.
+
+    Uses cumulative sums over the carried tail plus the new batch, so a
+    batch of n samples costs O(n + window) with no per-sample Python work.
+    A slope is only reported (NaN otherwise) once the window is full and
+    spans at least ``min_span`` seconds: short or bunched windows turn
+    sensor noise into large slopes.
+    """
+
+    def __init__(self, window: int, min_span: float = 0.0):
+        self.window = window
+        self.min_span = min_span
+        self.reset()
+
+    def reset(self):
+        self._t = np.empty(0)
+        self._x = np.empty(0)
+
+    def update(self, t: np.ndarray, x: np.ndarray) -> np.ndarray:
+        tt = np.concatenate((self._t, t))
+        xx = np.concatenate((self._x, x))
+        keep = self.window - 1
+        self._t, self._x = tt[-keep:] if keep else tt[:0], xx[-keep:] if keep else xx[:0]
+
+        tr = tt - tt[0]                       # keep sums well-conditioned
+        zero = np.zeros(1)
+        st = np.concatenate((zero, np.cumsum(tr)))
+        sx = np.concatenate((zero, np.cumsum(xx)))
+        stt = np.concatenate((zero, np.cumsum(tr * tr)))
+        stx = np.concatenate((zero, np.cumsum(tr * xx)))
+
+        end = np.arange(len(tt) - len(t) + 1, len(tt) + 1)
+        start = np.maximum(end - self.window, 0)
+        n = end - start
+        span = tr[end - 1] - tr[start]
+        sum_t, sum_x = st[end] - st[start], sx[end] - sx[start]
+        num = n * (stx[end] - stx[start]) - sum_t * sum_x
+        den = n * (stt[end] - stt[start]) - sum_t * sum_t
+        ok = (n == self.window) & (span >= max(self.min_span, 1e-9)) & (den > 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            slope = np.where(ok, num / den, np.nan)
+        return slope
+
+
+class VerticalKinematics(DerivedStage):
+    """Filtered vertical speed and acceleration from ``Alt``.
+
+    Each is the least-squares slope over a short sliding window, which
+    smooths barometric noise without a recursive filter. Nothing is emitted
+    until a full window covering ``min_span`` seconds is available.
+    """
+
+    inputs = ("Alt",)
+    outputs = ("VSpeed", "VAccel")
+
+    def __init__(self, window: int = 20, min_span: float = 0.05):
+        super().__init__()
+        self._vel = _SlidingSlope(window, min_span)
+        self._acc = _SlidingSlope(window, min_span)
+
+    def update(self, t, cols):
+        alt = cols["Alt"]
+        vel = np.full(len(t), np.nan)
+        good = np.isfinite(alt)                 # one NaN would poison the running sums
+        if good.any():
+            vel[good] = self._vel.update(t[good], alt[good])
+        acc = np.full(len(t), np.nan)
+        ok = np.isfinite(vel)
+        if ok.any():
+            acc[ok] = self._acc.update(t[ok], vel[ok])
+        return {"VSpeed": vel, "VAccel": acc}
+
+    def reset(self):
+        super().reset()
+        self._vel.reset()
+        self._acc.reset()
+
+
+class FlightEvents(DerivedStage):
+    """Flight-phase state machine: liftoff, burnout, apogee and landing.
+
+    Emits a ``Phase`` channel (see ``PHASES``) and one event per transition.
+    Liftoff, burnout and landing must hold for a dwell time, so a single
+    noisy sample cannot advance the phase. Transitions are located per
+    batch with vectorized searches; only the phase changes themselves are
+    handled in Python.
+    """
+
+    inputs = ("Alt", "VSpeed", "VAccel")
+    outputs = ("Phase",)
+    PHASES = ("PAD", "BOOST", "COAST", "DESCENT", "LANDED")
+
+    def __init__(self, liftoff_speed: float = 15.0, landed_speed: float = 2.0,
+                 landed_dwell: float = 5.0, liftoff_dwell: float = 0.25,
+                 burnout_dwell: float = 0.25):
+        super().__init__()
+        self.liftoff_speed = liftoff_speed
+        self.landed_speed = landed_speed
+        self.landed_dwell = landed_dwell
+        self.liftoff_dwell = liftoff_dwell
+        self.burnout_dwell = burnout_dwell
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.phase = 0
+        self.apogee: Optional[Tuple[float, float]] = None   # (time, altitude)
+        self._max_alt = -np.inf
+        self._max_alt_t = 0.0
+        self._held_since: Optional[float] = None      # start of a condition run spanning batches
+
+    def update(self, t, cols):
+        alt, vel, acc = cols["Alt"], cols["VSpeed"], cols["VAccel"]
+        phase = np.empty(len(t))
+        i = 0
+        while i < len(t):
+            j = self._next_transition(t, alt, vel, acc, i)
+            phase[i:j] = self.phase
+            if j >= len(t):
+                break
+            self._advance(t[j])
+            i = j
+        return {"Phase": phase}
+
+    def _next_transition(self, t, alt, vel, acc, i) -> int:
+        """Index of the first sample at or after ``i`` that changes phase (len(t) if none)."""
+        n = len(t)
+        if self.phase == 0:
+            return i + self._held_index(t[i:], vel[i:] > self.liftoff_speed, self.liftoff_dwell)
+        elif self.phase == 1:
+            return i + self._held_index(t[i:], acc[i:] < 0, self.burnout_dwell)
+        elif self.phase == 2:
+            self._track_apogee(t[i:], alt[i:])
+            hits = np.flatnonzero(vel[i:] <= 0)
+            return i + hits[0] if hits.size else n
+        elif self.phase == 3:
+            return i + self._held_index(t[i:], np.abs(vel[i:]) < self.landed_speed, self.landed_dwell)
+        return n
+
+    def _track_apogee(self, t, alt):
+        if alt.size:
+            k = int(np.argmax(alt))
+            if alt[k] > self._max_alt:
+                self._max_alt, self._max_alt_t = float(alt[k]), float(t[k])
+
+    def _held_index(self, t, cond, dwell) -> int:
+        """First index where ``cond`` has held for ``dwell`` seconds (len(t) if none)."""
+        broken = ~cond
+        since = np.full(len(t), np.nan)
+        # Start of the current run of ``cond`` at every sample
+        last_break = np.maximum.accumulate(np.where(broken, np.arange(len(t)), -1))
+        run_start = t[np.minimum(last_break + 1, len(t) - 1)]
+        if self._held_since is not None:
+            run_start = np.where(last_break < 0, self._held_since, run_start)
+        since[cond] = (t - run_start)[cond]
+        done = np.flatnonzero(since >= dwell)
+        if done.size:
+            return int(done[0])
+        self._held_since = None if broken[-1] else float(run_start[-1])
+        return len(t)
+
+    def _advance(self, t: float):
+        t = float(t)
+        self.phase += 1
+        self._held_since = None
+        name = self.PHASES[self.phase]
+        if name == "BOOST":
+            self.events.append((t, "Liftoff detected"))
+        elif name == "COAST":
+            self.events.append((t, "Burnout detected"))
+        elif name == "DESCENT":
+            self.apogee = (self._max_alt_t, self._max_alt)
+            self.events.append((t, f"Apogee {self._max_alt:.1f} m at t={self._max_alt_t:.2f}"))
+        elif name == "LANDED":
+            self.events.append((t, "Landing detected"))
+
+
+class DerivedPipeline:
+    """Runs derived stages, in order, over each batch of parsed packets.
+
+    Outputs are written back into the packet dicts, so later stages can
+    consume earlier outputs and the telemetry store records them as
+    ordinary channels. NaN outputs (e.g. filter warm-up) are dropped.
+    """
+
+    def __init__(self, stages: Sequence[DerivedStage]):
+        self.stages = list(stages)
+
+    def process(self, batch: Sequence[Tuple[float, Packet]]) -> List[Tuple[float, str]]:
+        """Add derived fields to ``batch`` in place; return the stage events raised."""
+        events = []
+        for stage in self.stages:
+            rows = [i for i, (_, pkt) in enumerate(batch)
+                    if all(isinstance(pkt.get(k), float) for k in stage.inputs)]
+            if not rows:
+                continue
+            t = np.fromiter((batch[i][0] for i in rows), dtype=float, count=len(rows))
+            cols = {k: np.fromiter((batch[i][1][k] for i in rows), dtype=float, count=len(rows))
+                    for k in stage.inputs}
+            for name, values in stage.update(t, cols).items():
+                for i, v in zip(rows, values.tolist()):
+                    if v == v:                  # skip NaN
+                        batch[i][1][name] = v
+            if stage.events:
+                events.extend(stage.events)
+                stage.events.clear()
+        return events
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+
+def default_pipeline() -> DerivedPipeline:
+    return DerivedPipeline([EulerFromQuaternion(), VerticalKinematics(), FlightEvents()])
@@ -1,8 +1,11 @@
 import tkinter as tk
+from collections import deque
 from PIL import Image, ImageTk
 from tkintermapview import TkinterMapView
 
 class GPSPage(tk.Frame):
+    TRAJECTORY_POINTS = 5000    # GPS fixes kept for the map path
+
     def __init__(self, master, telemetry, user, **kwargs):
         super().__init__(master, bg="#151e24", **kwargs)
         self.telemetry = telemetry
@@ -27,7 +30,9 @@ class GPSPage(tk.Frame):
         self.map_widget.pack(fill="both", expand=True, padx=18, pady=8)
         self.map_widget.set_position(43.7735, -79.5015)
         self.map_marker = self.map_widget.set_marker(43.7735, -79.5015, text="Rocket")
-        self.trajectory_coords = []
+        self.trajectory_coords = deque(maxlen=self.TRAJECTORY_POINTS)
+        self.map_path = None        # one CanvasPath, updated in place
+        self._fix_time = None
 
         # Overlay info
         overlay = tk.Frame(self.map_widget, bg="#162026")
@@ -41,27 +46,41 @@ class GPSPage(tk.Frame):
         self.after(1000, self.update_gps)
 
     def update_gps(self):
-        d = self.telemetry.data
-        if d["Lat"] and d["Lon"]:
-            lat = d["Lat"][-1]
-            lon = d["Lon"][-1]
+        fix = self._last_fix()
+        if fix and fix[0] != self._fix_time:
+            self._fix_time, lat, lon = fix
             self.lat_lbl.config(text=f"Lat: {lat:.6f}")
             self.lon_lbl.config(text=f"Lon: {lon:.6f}")
             self.map_marker.set_position(lat, lon)
             self.map_widget.set_position(lat, lon)
             self.trajectory_coords.append((lat, lon))
-            if len(self.trajectory_coords) > 1:
-                self.map_widget.set_path(self.trajectory_coords, color="blue")
+            # set_path would add a new canvas object on every call
+            if self.map_path is not None:
+                self.map_path.set_position_list(list(self.trajectory_coords))
+            elif len(self.trajectory_coords) > 1:
+                self.map_path = self.map_widget.set_path(list(self.trajectory_coords), color="blue")
         self.after(1000, self.update_gps)
 
+    def _last_fix(self):
+        # Lat/Lon are separate channels; only pair fixes that share a timestamp
+        lat = self.telemetry.get_last("Lat")
+        lon = self.telemetry.get_last("Lon")
+        if lat and lon and lat[0] == lon[0]:
+            return lat[0], lat[1], lon[1]
+        return None
+
+    def _last_position(self):
+        fix = self._last_fix()
+        return fix[1:] if fix else None
+
     def save_location(self):
         from tkinter import filedialog
-        d = self.telemetry.data
-        if d["Lat"] and d["Lon"]:
+        pos = self._last_position()
+        if pos:
             filename = filedialog.asksaveasfilename(defaultextension=".txt")
             if filename:
                 with open(filename, "w") as f:
-                    f.write(f"Latitude: {d['Lat'][-1]:.6f}\nLongitude: {d['Lon'][-1]:.6f}\n")
+                    f.write(f"Latitude: {pos[0]:.6f}\nLongitude: {pos[1]:.6f}\n")
 
     def export_map(self):
         from tkinter import messagebox
@@ -0,0 +1,253 @@
+# history.py
+# --------------------------------------------------------------------------
+#  Multi-resolution sample history: full-resolution recent window plus
+#  progressively downsampled min/max/mean levels for the whole flight
+#  © 2025  Arbalest Rocketry
+# --------------------------------------------------------------------------
+
+import math
+from collections import namedtuple
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Rows returned by HistoryPyramid.query; ``level`` is 0 for raw samples and
+# ``n`` is the number of finite raw samples behind each row, so statistics
+# over rows of mixed resolution can be weighted (sum(mean * n) / sum(n)).
+# NaN/inf readings are left out of mean/min/max; a row with n == 0 is NaN.
+Window = namedtuple("Window", ["t", "mean", "min", "max", "level", "n"])
+
+
+class _Ring:
+    """Fixed-capacity FIFO of float rows backed by a NumPy array.
+
+    Column 0 is a non-decreasing timestamp, so positions can be found by
+    binary search over logical indices.
+    """
+
+    def __init__(self, capacity: int, width: int):
+        self.capacity = capacity
+        self.buf = np.empty((capacity, width))
+        self.start = 0
+        self.size = 0
+        self.evicted = False        # True once the oldest rows have been dropped
+
+    def append(self, row):
+        end = self.start + self.size
+        self.buf[end % self.capacity] = row
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+            self.evicted = True
+
+    def key(self, i: int) -> float:
+        return self.buf[(self.start + i) % self.capacity, 0]
+
+    def bisect_left(self, x: float) -> int:
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < x:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def bisect_right(self, x: float) -> int:
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if x < self.key(mid):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def rows(self, i: int = 0, j: Optional[int] = None, step: int = 1) -> np.ndarray:
+        """Logical rows [i:j:step] in time order (copy)."""
+        j = self.size if j is None else j
+        return self.buf[(self.start + np.arange(i, j, step)) % self.capacity]
+
+    def last(self) -> np.ndarray:
+        return self.buf[(self.start + self.size - 1) % self.capacity]
+
+    def clear(self):
+        self.start = 0
+        self.size = 0
+        self.evicted = False
+
+
+class HistoryPyramid:
+    """Bounded, incrementally built history for one channel.
+
+    Level 0 keeps the last ``recent`` raw samples. Every ``factor`` rows of
+    level k are folded into one (t_start, mean, min, max, n) row of level k+1,
+    and each downsampled level keeps at most ``capacity`` rows, so memory is
+    fixed while the coarsest level spans the whole session. Appends are O(1)
+    amortised; ``query`` costs O(log n + points).
+    """
+
+    def __init__(self, recent: int = 1000, factor: int = 8, levels: int = 5,
+                 capacity: int = 2048):
+        self.factor = factor
+        self.levels: List[_Ring] = [_Ring(recent, 2)]
+        self.levels += [_Ring(capacity, 5) for _ in range(levels)]
+        # Partial bucket per downsampled level: [rows, t_start, sum, min, max, finite samples]
+        self._acc = [[0, 0.0, 0.0, np.inf, -np.inf, 0] for _ in range(levels)]
+        self.count = 0
+
+    def append(self, t: float, v: float):
+        self.levels[0].append((t, v))
+        self.count += 1
+        self._fold(0, t, v, v, v, 1 if math.isfinite(v) else 0)
+
+    def _fold(self, k: int, t: float, mean: float, lo: float, hi: float, n: int):
+        # Feed one row of level k into the partial bucket of level k+1
+        while k < len(self._acc):
+            acc = self._acc[k]
+            if acc[0] == 0:
+                acc[1] = t
+            acc[0] += 1
+            if n:                               # rows without finite samples add nothing
+                acc[2] += mean * n
+                acc[5] += n
+                if lo < acc[3]:
+                    acc[3] = lo
+                if hi > acc[4]:
+                    acc[4] = hi
+            if acc[0] < self.factor:
+                return
+            t, n = acc[1], acc[5]
+            mean, lo, hi = (acc[2] / n, acc[3], acc[4]) if n else (np.nan, np.nan, np.nan)
+            self.levels[k + 1].append((t, mean, lo, hi, n))
+            acc[:] = [0, 0.0, 0.0, np.inf, -np.inf, 0]
+            k += 1
+
+    # ───────────────────────────────────────────────────────────────────
+    def last(self) -> Optional[Tuple[float, float]]:
+        raw = self.levels[0]
+        if not raw.size:
+            return None
+        t, v = raw.last()
+        return float(t), float(v)
+
+    def recent(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Full-resolution (timestamps, values) of the recent window."""
+        rows = self.levels[0].rows()
+        return rows[:, 0], rows[:, 1]
+
+    def span(self) -> Optional[Tuple[float, float]]:
+        """Earliest and latest timestamp still represented at any level."""
+        starts = [ring.key(0) for ring in self.levels if ring.size]
+        if not starts:
+            return None
+        return min(starts), float(self.levels[0].last()[0])
+
+    def query(self, t0: Optional[float] = None, t1: Optional[float] = None,
+              points: int = 1000) -> Window:
+        """Return at most about ``points`` rows covering [t0, t1].
+
+        Served from the finest level that still holds t0 and fits the
+        budget; the newest samples not yet folded into that level are
+        stitched on from the finer levels below it.
+        """
+        span = self.span()
+        if span is None:
+            empty = np.empty(0)
+            return Window(empty, empty, empty, empty, 0, empty)
+        t0 = span[0] if t0 is None else t0
+        t1 = span[1] if t1 is None else t1
+
+        nonempty = [k for k, ring in enumerate(self.levels) if ring.size]
+        chosen = nonempty[-1]
+        for k in nonempty:
+            ring = self.levels[k]
+            if ring.evicted and ring.key(0) > t0:
+                continue                      # older part of the range already dropped
+            if ring.bisect_right(t1) - ring.bisect_left(t0) <= points:
+                chosen = k
+                break
+
+        parts = [self._rows(chosen, t0, t1, points)]
+        # Stitch on the rows of finer levels still waiting in a partial bucket
+        for k in range(chosen - 1, -1, -1):
+            ring = self.levels[k]
+            pending = self._acc[k][0]
+            i = max(ring.size - pending, ring.bisect_left(t0))
+            j = ring.bisect_right(t1)
+            if j > i:
+                parts.append(self._as_stats(k, ring.rows(i, j)))
+
+        rows = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        return Window(rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3], chosen, rows[:, 4])
+
+    def _rows(self, k: int, t0: float, t1: float, points: int) -> np.ndarray:
+        ring = self.levels[k]
+        i, j = ring.bisect_left(t0), ring.bisect_right(t1)
+        step = max(1, -(-(j - i) // max(points, 1)))     # only if even the coarsest level overflows
+        return self._as_stats(k, ring.rows(i, j, step))
+
+    @staticmethod
+    def _as_stats(k: int, rows: np.ndarray) -> np.ndarray:
+        # Raw rows are (t, v); present them as (t, mean, min, max, n)
+        if k:
+            return rows
+        return np.column_stack((rows[:, [0, 1, 1, 1]], np.isfinite(rows[:, 1])))
+
+    def clear(self):
+        for ring in self.levels:
+            ring.clear()
+        for acc in self._acc:
+            acc[:] = [0, 0.0, 0.0, np.inf, -np.inf, 0]
+        self.count = 0
+
+
+class StaticHistory:
+    """Read-only pyramid over a complete, sorted (t, v) series such as a recorded flight.
+
+    All levels are built up front with array reshapes, so ``query`` has the
+    same O(log n + points) cost and Window rows as ``HistoryPyramid``.
+    """
+
+    def __init__(self, t: np.ndarray, v: np.ndarray, factor: int = 8, min_rows: int = 64):
+        t = np.asarray(t, dtype=float)
+        v = np.asarray(v, dtype=float)
+        self.levels = [(t, v, v, v, np.isfinite(v).astype(float))]
+        while len(self.levels[-1][0]) > min_rows:
+            self.levels.append(self._fold(self.levels[-1], factor))
+
+    @staticmethod
+    def _fold(level, factor):
+        t, mean, lo, hi, n = level
+        starts = np.arange(0, len(t), factor)
+        ok = n > 0                                     # leave NaN/inf readings out
+        counts = np.add.reduceat(n, starts)            # the last bucket may be partial
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (t[starts], np.add.reduceat(np.where(ok, mean * n, 0.0), starts) / counts,
+                    np.fmin.reduceat(np.where(ok, lo, np.nan), starts),
+                    np.fmax.reduceat(np.where(ok, hi, np.nan), starts), counts)
+
+    def span(self) -> Optional[Tuple[float, float]]:
+        t = self.levels[0][0]
+        if not len(t):
+            return None
+        return float(t[0]), float(t[-1])
+
+    def query(self, t0: Optional[float] = None, t1: Optional[float] = None,
+              points: int = 1000) -> Window:
+        """Return at most about ``points`` rows covering [t0, t1] from the finest level that fits."""
+        span = self.span()
+        if span is None:
+            empty = np.empty(0)
+            return Window(empty, empty, empty, empty, 0, empty)
+        t0 = span[0] if t0 is None else t0
+        t1 = span[1] if t1 is None else t1
+        for k, (t, mean, lo, hi, n) in enumerate(self.levels):
+            # Include the bucket that starts before t0 but covers it
+            i = max(np.searchsorted(t, t0, side="right") - 1, 0) if k else np.searchsorted(t, t0)
+            j = np.searchsorted(t, t1, side="right")
+            if j - i <= points or k == len(self.levels) - 1:
+                step = max(1, -(-(j - i) // max(points, 1)))
+                sl = slice(i, j, step)
+                return Window(t[sl], mean[sl], lo[sl], hi[sl], k, n[sl])
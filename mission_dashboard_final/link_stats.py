@@ -0,0 +1,144 @@
+# link_stats.py
+# --------------------------------------------------------------------------
+#  Streaming link-quality metrics (sequence gaps, loss, rate, jitter)
+#  © 2025  Arbalest Rocketry
+# --------------------------------------------------------------------------
+
+import math
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+
+class LinkStats:
+    """Per-source link metrics, updated in O(1) for every received packet.
+
+    Sequence numbers are optional: without them only rate, jitter and
+    packet age are available and loss is reported as ``None``.
+    """
+
+    # Upper edges (ms) of the inter-arrival jitter histogram; the last
+    # bucket collects everything above the final edge.
+    JITTER_EDGES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+    # A backwards jump larger than this is treated as a sender restart
+    # rather than a late packet.
+    RESET_WINDOW = 1000
+
+    def __init__(self, source: str, seq_modulus: Optional[int] = None, alpha: float = 1 / 16):
+        self.source = source
+        self.seq_modulus = seq_modulus
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self.received = 0
+        self.first_time: Optional[float] = None
+        self.last_time: Optional[float] = None
+        # Sequence tracking
+        self.last_seq: Optional[int] = None
+        self.expected = 0            # packets the sender emitted, per sequence numbers
+        self.lost = 0
+        self.gaps = 0
+        self.max_gap = 0
+        self.late = 0                # out-of-order arrivals
+        self.duplicates = 0          # repeated sequence numbers
+        self.restarts = 0
+        # Inter-arrival timing (EWMA interval, RFC 3550 style jitter)
+        self.mean_interval: Optional[float] = None
+        self.jitter = 0.0
+        self.jitter_hist: List[int] = [0] * (len(self.JITTER_EDGES_MS) + 1)
+
+    # ───────────────────────────────────────────────────────────────────
+    def update(self, recv_time: float, seq: Optional[float] = None) -> int:
+        """Account for one packet; return the number of packets missing before it."""
+        self.received += 1
+        if self.last_time is None:
+            self.first_time = recv_time
+        else:
+            interval = recv_time - self.last_time
+            if self.mean_interval is None:
+                self.mean_interval = interval
+            else:
+                deviation = abs(interval - self.mean_interval)
+                self.jitter += (deviation - self.jitter) * self.alpha
+                self.mean_interval += (interval - self.mean_interval) * self.alpha
+                self.jitter_hist[bisect_left(self.JITTER_EDGES_MS, deviation * 1000.0)] += 1
+        self.last_time = recv_time
+
+        if seq is None or not math.isfinite(seq):
+            return 0                 # "Seq:nan" counts as a packet without a sequence number
+        return self._update_seq(int(seq))
+
+    def _update_seq(self, seq: int) -> int:
+        if self.last_seq is None:
+            self.last_seq = seq
+            self.expected = 1
+            return 0
+
+        delta = seq - self.last_seq
+        if self.seq_modulus:
+            delta %= self.seq_modulus
+            if delta > self.seq_modulus // 2:
+                delta -= self.seq_modulus
+
+        if delta == 0:
+            self.duplicates += 1     # a repeated frame says nothing about loss
+            return 0
+        if delta < 0:
+            if -delta > self.RESET_WINDOW:
+                # Sender restarted its counter; resynchronise.
+                self.restarts += 1
+                self.last_seq = seq
+                self.expected += 1
+            else:
+                self.late += 1
+                if self.lost:
+                    self.lost -= 1   # a packet we counted as lost has shown up
+            return 0
+
+        missing = delta - 1
+        self.expected += delta
+        self.last_seq = seq
+        if missing:
+            self.lost += missing
+            self.gaps += 1
+            self.max_gap = max(self.max_gap, missing)
+        return missing
+
+    # ───────────────────────────────────────────────────────────────────
+    @property
+    def loss_pct(self) -> Optional[float]:
+        if not self.expected:
+            return None
+        return 100.0 * self.lost / self.expected
+
+    @property
+    def rate(self) -> float:
+        """Effective packet rate (Hz) from the smoothed inter-arrival time."""
+        if not self.mean_interval:
+            return 0.0
+        return 1.0 / self.mean_interval
+
+    def since_last(self, now: Optional[float] = None) -> Optional[float]:
+        if self.last_time is None:
+            return None
+        return (time.time() if now is None else now) - self.last_time
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, object]:
+        """Return the current metrics as a plain dict."""
+        return {
+            "source": self.source,
+            "received": self.received,
+            "expected": self.expected,
+            "lost": self.lost,
+            "gaps": self.gaps,
+            "max_gap": self.max_gap,
+            "late": self.late,
+            "duplicates": self.duplicates,
+            "restarts": self.restarts,
+            "loss_pct": self.loss_pct,
+            "rate_hz": self.rate,
+            "jitter_ms": self.jitter * 1000.0,
+            "jitter_hist": list(self.jitter_hist),
+            "since_last_s": self.since_last(now),
+        }
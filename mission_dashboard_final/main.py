@@ -15,17 +15,20 @@ from telemetry_udp import Telemetry
 from intro_page import show_intro_popup
 
 class MainApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, udp_ip="127.0.0.1", udp_port=5005):
         super().__init__()
         self.title("Arbalest Rocketry Mission Dashboard")
-        self.state("zoomed")
+        try:
+            self.state("zoomed")                 # Windows / macOS
+        except tk.TclError:
+            self.attributes("-zoomed", True)     # X11 window managers
         self.configure(bg="#171e24")
         # Ensure telemetry thread is closed on exit
         self.protocol("WM_DELETE_WINDOW", self._on_close)
 
         # User and telemetry
         self.user = {"name": "", "callsign": ""}
-        self.telemetry = Telemetry()
+        self.telemetry = Telemetry(udp_ip, udp_port)
 
         # Cached page instances
         self.pages = {}
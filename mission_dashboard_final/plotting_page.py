@@ -4,12 +4,28 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
 
+from recorder import export_flight, open_flight
+
 class PlottingPage(tk.Frame):
+    PLOT_POINTS = 800    # rows requested per plot; whole-flight history is downsampled to fit
+    MIN_WIDTH = 0.5      # narrowest time window (s) the zoom allows
+    ZOOM_STEP = 1.5
+    SCRUB_WIDTH = 0.2    # fraction of the span shown when scrubbing starts from a full-span view
+
     def __init__(self, master, telemetry, user, **kwargs):
         super().__init__(master, bg="#181f26", **kwargs)
         self.telemetry = telemetry
         self.user = user
 
+        # Viewport: a time window [t0, t1] shared by all plots. In follow mode
+        # it tracks the newest data; frozen, it stays put until scrubbed/zoomed.
+        self.source = None          # None = live telemetry, else an opened flight log
+        self.follow = True
+        self.view_width = None      # seconds shown; None = whole span
+        self.view_end = None        # right edge while frozen
+        self._drawn = []            # per plot: (source, key, t0, t1) currently on screen
+        self._scrub_pos = 1.0       # last position set by code; Tk reports it back later
+
         # Logo row
         logo_frame = tk.Frame(self, bg="#181f26")
         logo_frame.pack(fill="x", pady=(8,2))
@@ -33,7 +49,9 @@ class PlottingPage(tk.Frame):
 
         # 2x2 Grid of Plots
         plot_keys = ["Alt","P","Accel","Gyro","T","Lat","Lon"]
-        self.axs, self.lines, self.canvases = [], [], []
+        self.axs, self.lines, self.envelopes, self.canvases = [], [], [], []
+        self.key_vars, self.key_menus = [], []
+        self.known_fields = []
         plot_frame = tk.Frame(self, bg="#181f26")
         plot_frame.pack(fill="both", expand=True, padx=18, pady=10)
         self.keys = plot_keys[:4]
@@ -48,46 +66,240 @@ class PlottingPage(tk.Frame):
                 ax.set_xlabel("Time (s)", color='#e0eefa', fontsize=10)
                 ax.set_ylabel(self.keys[idx], color='#e0eefa', fontsize=10)
                 line, = ax.plot([], [], color='#00ffea', linewidth=1.8)
-                canvas = FigureCanvasTkAgg(fig, master=plot_frame)
-                canvas.get_tk_widget().grid(row=i, column=j, padx=14, pady=8)
+                # min/max envelope, shown when plotting downsampled history
+                lo, = ax.plot([], [], color='#00ffea', linewidth=0.6, alpha=0.35)
+                hi, = ax.plot([], [], color='#00ffea', linewidth=0.6, alpha=0.35)
+                cell = tk.Frame(plot_frame, bg="#181f26")
+                cell.grid(row=i, column=j, padx=14, pady=8)
+                # Channel selector: any raw or derived channel can be plotted
+                var = tk.StringVar(value=self.keys[idx])
+                menu = tk.OptionMenu(cell, var, self.keys[idx], command=lambda key, idx=idx: self.select_key(idx, key))
+                menu.config(font=("Consolas", 10, "bold"), bg="#13212a", fg="#00ffea", highlightthickness=0)
+                menu.pack(anchor="w")
+                canvas = FigureCanvasTkAgg(fig, master=cell)
+                canvas.get_tk_widget().pack()
+                canvas.mpl_connect("scroll_event", self._on_scroll)
+                self.key_vars.append(var)
+                self.key_menus.append(menu)
                 self.axs.append(ax)
                 self.lines.append(line)
+                self.envelopes.append((lo, hi))
                 self.canvases.append(canvas)
+                self._drawn.append(None)
+
+        # Time-window browser: scrubber, zoom and follow-live / frozen
+        view_frame = tk.Frame(self, bg="#181f26")
+        view_frame.pack(fill="x", padx=32)
+        btn = dict(font=("Consolas", 10, "bold"), bg="#13212a", fg="#00ffea")
+        self.follow_btn = tk.Button(view_frame, text="LIVE", width=7, command=self.toggle_follow, **btn)
+        self.follow_btn.pack(side="left", padx=4)
+        tk.Button(view_frame, text="Zoom -", command=lambda: self.zoom(self.ZOOM_STEP), **btn).pack(side="left", padx=4)
+        tk.Button(view_frame, text="Zoom +", command=lambda: self.zoom(1 / self.ZOOM_STEP), **btn).pack(side="left", padx=4)
+        tk.Button(view_frame, text="Fit", command=self.zoom_fit, **btn).pack(side="left", padx=4)
+        tk.Button(view_frame, text="Open Log", command=self.open_log, **btn).pack(side="left", padx=4)
+        tk.Button(view_frame, text="Live Data", command=self.use_live, **btn).pack(side="left", padx=4)
+        self.view_label = tk.Label(view_frame, text="", font=("Consolas", 10), bg="#181f26", fg="#bbffee")
+        self.view_label.pack(side="right", padx=6)
+        self.scrub = tk.Scale(view_frame, from_=0.0, to=1.0, resolution=0.001, orient="horizontal",
+                              showvalue=False, command=self._on_scrub, bg="#181f26", troughcolor="#13212a",
+                              highlightthickness=0)
+        self.scrub.set(1.0)
+        self.scrub.pack(side="left", fill="x", expand=True, padx=10)
 
         # Bottom controls
         btns_frame = tk.Frame(self, bg="#181f26")
         btns_frame.pack(side="bottom", pady=16)
         tk.Button(btns_frame, text="Export CSV", font=("Consolas", 11, "bold"), bg="#13212a", fg="#00ffea", command=self.export_csv).pack(side="left", padx=14)
+        tk.Button(btns_frame, text="Export GSZ", font=("Consolas", 11, "bold"), bg="#13212a", fg="#00ffea", command=self.export_compressed).pack(side="left", padx=14)
         tk.Button(btns_frame, text="Capture Plot", font=("Consolas", 11, "bold"), bg="#13212a", fg="#00ffea", command=self.capture_plot).pack(side="left", padx=14)
 
         self.after(1000, self.update_page)
 
+    def select_key(self, idx, key):
+        self.keys[idx] = key
+        ax = self.axs[idx]
+        ax.set_title(f"{key} vs Time", color='#e0eefa', fontsize=12)
+        ax.set_ylabel(key, color='#e0eefa', fontsize=10)
+        self.lines[idx].set_data([], [])
+        for env in self.envelopes[idx]:
+            env.set_data([], [])
+        self._drawn[idx] = None
+        self.canvases[idx].draw_idle()
+        self.redraw()
+
+    def _refresh_key_menus(self):
+        fields = sorted(self.telemetry.fields() if self.source is None else self.source.channels)
+        if fields == self.known_fields:
+            return
+        self.known_fields = fields
+        for idx, (var, menu) in enumerate(zip(self.key_vars, self.key_menus)):
+            options = menu["menu"]
+            options.delete(0, "end")
+            for key in fields:
+                options.add_command(label=key, command=lambda key=key, idx=idx, var=var: (var.set(key), self.select_key(idx, key)))
+
     def update_page(self):
-        d = self.telemetry.data
+        self._refresh_key_menus()
         for k in self.vals:
-            if d[k]:
-                self.vals[k].config(text=f"{d[k][-1]:.2f}" if isinstance(d[k][-1], float) else d[k][-1])
-        times = np.array(d["time"])
+            last = self.telemetry.get_last(k)
+            if last:
+                self.vals[k].config(text=f"{last[1]:.2f}")
+        self.redraw()
+        self.after(1000, self.update_page)
+
+    # ── viewport ──────────────────────────────────────────────────────────
+    def _span(self):
+        if self.source is None:
+            return self.telemetry.get_span(self.keys)
+        return self.source.span()
+
+    def _window(self, key, t0, t1):
+        # Both sources binary-search their sorted timestamps: O(log n + points)
+        if self.source is None:
+            return self.telemetry.get_window(key, t0, t1, self.PLOT_POINTS)
+        return self.source.window(key, t0, t1, self.PLOT_POINTS)
+
+    def viewport(self):
+        """Current (t0, t1), or None before any data."""
+        span = self._span()
+        if span is None or span[1] <= span[0]:
+            return None
+        width = span[1] - span[0] if self.view_width is None else min(self.view_width, span[1] - span[0])
+        t1 = span[1] if self.follow or self.view_end is None else min(max(self.view_end, span[0] + width), span[1])
+        return t1 - width, t1
+
+    def redraw(self):
+        """Query and redraw only the plots whose (source, channel, viewport) changed."""
+        view = self.viewport()
+        if view is None:
+            return
+        t0, t1 = view
+        self._show_viewport(t0, t1)
         for i, key in enumerate(self.keys):
-            if key not in d or len(times) != len(d[key]) or len(times) < 2:
+            state = (id(self.source), key, t0, t1)
+            if self._drawn[i] == state:
                 continue
-            y = np.array(d[key])
-            self.lines[i].set_data(times, y)
+            w = self._window(key, t0, t1)
+            self._drawn[i] = state
+            self.lines[i].set_data(w.t, w.mean)
+            lo, hi = self.envelopes[i]
+            if w.level:
+                lo.set_data(w.t, w.min)
+                hi.set_data(w.t, w.max)
+            else:
+                lo.set_data([], [])
+                hi.set_data([], [])
+            self.axs[i].set_xlim(t0, t1)
             self.axs[i].relim()
-            self.axs[i].autoscale_view()
-            self.canvases[i].draw()
-        self.after(1000, self.update_page)
+            self.axs[i].autoscale_view(scalex=False)
+            self.canvases[i].draw_idle()
+
+    def _show_viewport(self, t0, t1):
+        span = self._span()
+        pos = round(1.0 if span[1] <= span[0] else (t1 - span[0]) / (span[1] - span[0]), 3)
+        if pos != self._scrub_pos:
+            self._scrub_pos = pos
+            self.scrub.set(pos)
+        mode = "LIVE" if self.follow else "FROZEN"
+        self.view_label.config(text=f"{mode}  {t1 - t0:.1f} s window, {span[1] - t1:.1f} s before end")
+
+    def _freeze(self, t1):
+        # Pin the width as well: "whole span" would keep growing with live data
+        view = self.viewport()
+        if self.view_width is None and view is not None:
+            self.view_width = view[1] - view[0]
+        self.follow = False
+        self.view_end = t1
+        self.follow_btn.config(text="FROZEN")
+
+    def toggle_follow(self):
+        if self.follow:
+            view = self.viewport()
+            self._freeze(view[1] if view else None)
+        else:
+            self.follow = True
+            self.follow_btn.config(text="LIVE")
+        self.redraw()
+
+    def zoom(self, factor, center=None):
+        """Scale the window width by ``factor``, keeping ``center`` (a time) in place."""
+        view = self.viewport()
+        if view is None:
+            return
+        t0, t1 = view
+        width = max((t1 - t0) * factor, self.MIN_WIDTH)
+        span = self._span()
+        width = min(width, span[1] - span[0])
+        self.view_width = None if self.follow and width >= span[1] - span[0] else width
+        if not self.follow:
+            center = (t0 + t1) / 2 if center is None else center
+            frac = (center - t0) / (t1 - t0) if t1 > t0 else 0.5
+            self.view_end = center + (1 - frac) * width
+        self.redraw()
+
+    def zoom_fit(self):
+        span = self._span()
+        if self.follow or span is None:
+            self.view_width = None
+        else:
+            self.view_width, self.view_end = span[1] - span[0], span[1]    # stay frozen on today's span
+        self.redraw()
+
+    def _on_scroll(self, event):
+        self.zoom(1 / self.ZOOM_STEP if event.button == "up" else self.ZOOM_STEP, event.xdata)
+
+    def _on_scrub(self, value):
+        span = self._span()
+        if span is None or abs(float(value) - self._scrub_pos) < 0.0005:
+            return
+        self._scrub_pos = float(value)
+        full = span[1] - span[0]
+        if self.view_width is None or self.view_width >= full:
+            # A window as wide as the span has nowhere to move
+            self.view_width = max(full * self.SCRUB_WIDTH, min(self.MIN_WIDTH, full))
+        self._freeze(span[0] + float(value) * full)
+        self.redraw()
+
+    def open_log(self):
+        from tkinter import filedialog
+        filename = filedialog.askopenfilename(filetypes=[("Flight logs", "*.gsr *.gsz"), ("All files", "*")])
+        if filename:
+            self.source = open_flight(filename)
+            self.view_width = None
+            self._freeze(None)
+            self._drawn = [None] * len(self._drawn)
+            self._refresh_key_menus()
+            self.redraw()
+
+    def use_live(self):
+        self.source = None
+        self.view_width = None
+        self.follow = True
+        self.follow_btn.config(text="LIVE")
+        self._drawn = [None] * len(self._drawn)
+        self._refresh_key_menus()
+        self.redraw()
 
     def export_csv(self):
         from tkinter import filedialog
-        d = self.telemetry.data
         filename = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")])
         if filename:
-            keys = list(d.keys())
-            with open(filename, "w") as f:
-                f.write(",".join(keys) + "\n")
-                for i in range(len(d["time"])):
-                    f.write(",".join([str(d[k][i]) if len(d[k]) > i else "" for k in keys]) + "\n")
+            # Channels are sampled independently; align them on a uniform grid
+            # with one row per sample of the busiest channel
+            keys = self.telemetry.fields()
+            n = max((len(self.telemetry.get_history(k)) for k in keys), default=0)
+            grid, cols = self.telemetry.resample(keys, n=max(n, 1), method="hold")
+            table = np.column_stack([grid] + [cols[k] for k in keys])
+            np.savetxt(filename, table, delimiter=",", fmt="%.6f",
+                       header=",".join(["time"] + keys), comments="")
+
+    def export_compressed(self):
+        # Raw per-channel samples in the compressed flight-log format, readable
+        # by analyze_flight.py; no grid alignment needed
+        from tkinter import filedialog
+        filename = filedialog.asksaveasfilename(defaultextension=".gsz", filetypes=[("Compressed telemetry", "*.gsz")])
+        if filename:
+            export_flight(filename, {k: self.telemetry.get_series(k) for k in self.telemetry.fields()})
 
     def capture_plot(self):
         from tkinter import filedialog
@@ -0,0 +1,256 @@
+# recorder.py
+# --------------------------------------------------------------------------
+#  Flight recorder: appends every stored telemetry sample to a flat binary
+#  log that post-flight tools can memory-map
+#  © 2025  Arbalest Rocketry
+# --------------------------------------------------------------------------
+#
+#  Log layout
+#    <name>.gsr       packed little-endian records (t: f8, ch: u2, v: f8)
+#    <name>.gsz       compressed alternative: chunks of uvarint channel id
+#                     followed by one codec block (see codec.py)
+#    <name>.*.json    metadata: format tag and the channel-name table that
+#                     maps record ``ch`` ids to field names
+
+import json
+import os
+import time
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from codec import BLOCK_SIZE, decode_block, encode_block, read_uvarint, uvarint_encode
+from history import StaticHistory, Window
+
+FORMAT = "gsr1"
+COMPRESSED_FORMAT = "gsz2"          # gsz1 blocks stored the start time twice
+COMPRESSED_SUFFIX = ".gsz"
+RECORD_DTYPE = np.dtype([("t", "<f8"), ("ch", "<u2"), ("v", "<f8")])
+
+
+def meta_path(path: str) -> str:
+    return path + ".json"
+
+
+class FlightRecorder:
+    """Buffered writer for the flight log; not thread-safe (Telemetry calls it under its lock).
+
+    ``compress`` selects the block-compressed format; by default it follows
+    the file extension (``.gsz``). Compressed blocks hold one flush worth of
+    samples per channel, so a longer ``flush_interval`` compresses better.
+    """
+
+    def __init__(self, path: str, flush_every: int = 4096, flush_interval: float = 1.0,
+                 compress: bool = None):
+        self.path = path
+        self.compress = path.endswith(COMPRESSED_SUFFIX) if compress is None else compress
+        self.format = COMPRESSED_FORMAT if self.compress else FORMAT
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.channels: Dict[str, int] = {}
+        self.records = 0
+        self.started = time.time()
+        self._buf = []
+        self._last_flush = time.monotonic()
+        self._file = open(path, "wb")
+        self._write_meta()
+
+    def write(self, rows: Iterable[Tuple[float, str, float]]):
+        """Queue (t, field, value) samples; flushed in blocks."""
+        for t, field, v in rows:
+            ch = self.channels.get(field)
+            if ch is None:
+                ch = self.channels[field] = len(self.channels)
+                self._write_meta()
+            self._buf.append((t, ch, v))
+        if len(self._buf) >= self.flush_every or time.monotonic() - self._last_flush > self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self._buf:
+            rows = np.array(self._buf, dtype=RECORD_DTYPE)
+            if self.compress:
+                self._file.write(_encode_chunks(rows))
+            else:
+                self._file.write(rows.tobytes())
+            self.records += len(self._buf)
+            self._buf.clear()
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+        self._write_meta()
+
+    def _write_meta(self):
+        _write_meta(self.path, self.format, sorted(self.channels, key=self.channels.get), self.started)
+
+
+def _write_meta(path, fmt, channels, started):
+    meta = {"format": fmt, "channels": list(channels), "started": started}
+    if fmt == FORMAT:
+        meta["record"] = [[name, RECORD_DTYPE[name].str] for name in RECORD_DTYPE.names]
+    tmp = meta_path(path) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=1)
+    os.replace(tmp, meta_path(path))
+
+
+def _encode_chunks(rows: np.ndarray) -> bytes:
+    """One chunk per channel present in ``rows``, each keeping arrival order."""
+    ch = rows["ch"]
+    order = np.argsort(ch, kind="stable")
+    ids, starts = np.unique(ch[order], return_index=True)
+    bounds = np.append(starts, len(order))
+    out = []
+    for i, c in enumerate(ids):
+        sel = rows[order[bounds[i]:bounds[i + 1]]]
+        out.append(uvarint_encode([c]) + encode_block(sel["t"], sel["v"]))
+    return b"".join(out)
+
+
+def export_flight(path: str, series: Dict[str, Tuple[np.ndarray, np.ndarray]], started: float = None):
+    """Write {field: (t, v)} arrays as a compressed flight log readable by ``open_flight``."""
+    names = list(series)
+    with open(path, "wb") as f:
+        for c, name in enumerate(names):
+            t, v = series[name]
+            for i in range(0, len(t), BLOCK_SIZE):
+                f.write(uvarint_encode([c]) + encode_block(t[i:i + BLOCK_SIZE], v[i:i + BLOCK_SIZE]))
+    _write_meta(path, COMPRESSED_FORMAT, names, time.time() if started is None else started)
+
+
+class _LogWindows:
+    """Time-window queries shared by both log readers; subclasses provide ``series``."""
+
+    def window(self, name: str, t0: float = None, t1: float = None, points: int = 1000) -> Window:
+        """Return about ``points`` (t, mean, min, max) rows of a channel over [t0, t1].
+
+        The channel's pyramid is built on first use; every later window is
+        two binary searches plus the rows returned.
+        """
+        if name not in self._histories:
+            self._histories[name] = StaticHistory(*self.series(name))
+        return self._histories[name].query(t0, t1, points)
+
+
+class FlightLog(_LogWindows):
+    """Read-only, memory-mapped view of a recorded flight log.
+
+    Nothing is decoded into Python objects: ``series`` returns NumPy arrays
+    for one channel, built from a single stable sort of the channel-id column
+    on first use.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(meta_path(path)) as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != FORMAT:
+            raise ValueError(f"{path}: unsupported flight log format {self.meta.get('format')!r}")
+        self.channels = list(self.meta["channels"])
+        # A recorder killed mid-write can leave a partial trailing record
+        n = os.path.getsize(path) // RECORD_DTYPE.itemsize
+        self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(n,)) if n else \
+            np.empty(0, dtype=RECORD_DTYPE)
+        self._index = None
+        self._histories = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def _build_index(self):
+        ch = np.asarray(self.records["ch"])
+        order = np.argsort(ch, kind="stable")         # keeps time order within a channel
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(ch, minlength=len(self.channels)))))
+        t = np.asarray(self.records["t"])[order]
+        v = np.asarray(self.records["v"])[order]
+        self._index = (t, v, bounds)
+
+    def series(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (timestamps, values) for a channel (empty arrays if absent)."""
+        if name not in self.channels:
+            return np.empty(0), np.empty(0)
+        if self._index is None:
+            self._build_index()
+        t, v, bounds = self._index
+        i = self.channels.index(name)
+        return t[bounds[i]:bounds[i + 1]], v[bounds[i]:bounds[i + 1]]
+
+    def span(self) -> Tuple[float, float]:
+        if not len(self.records):
+            return 0.0, 0.0
+        return float(self.records["t"][0]), float(self.records["t"][-1])
+
+
+class CompressedFlightLog(_LogWindows):
+    """Read-only view of a compressed (``gsz2``) flight log with the FlightLog interface.
+
+    Opening only walks the chunk headers; a channel's blocks are decoded on
+    its first ``series`` call and cached.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(meta_path(path)) as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != COMPRESSED_FORMAT:
+            raise ValueError(f"{path}: unsupported flight log format {self.meta.get('format')!r}")
+        self.channels = list(self.meta["channels"])
+        size = os.path.getsize(path)
+        self._buf = np.memmap(path, dtype=np.uint8, mode="r") if size else np.empty(0, np.uint8)
+        self._blocks = {i: [] for i in range(len(self.channels))}
+        self._cache = {}
+        self._histories = {}
+        self._count = 0
+        pos = 0
+        while pos < size:
+            try:
+                start = pos
+                ch, pos = read_uvarint(self._buf, pos)
+                n, pos = read_uvarint(self._buf, pos)
+                _, pos = read_uvarint(self._buf, pos)
+                ts_len, pos = read_uvarint(self._buf, pos)
+                val_len, pos = read_uvarint(self._buf, pos)
+            except ValueError:
+                break
+            pos += ts_len + val_len
+            if pos > size or ch not in self._blocks:
+                break               # partial trailing chunk from a recorder killed mid-write
+            self._blocks[ch].append(start)
+            self._count += n
+
+    def __len__(self):
+        return self._count
+
+    def series(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (timestamps, values) for a channel (empty arrays if absent)."""
+        if name not in self.channels:
+            return np.empty(0), np.empty(0)
+        if name not in self._cache:
+            ts, vs = [np.empty(0)], [np.empty(0)]
+            for start in self._blocks[self.channels.index(name)]:
+                _, pos = read_uvarint(self._buf, start)
+                t, v, _ = decode_block(self._buf, pos)
+                ts.append(t)
+                vs.append(v)
+            self._cache[name] = (np.concatenate(ts), np.concatenate(vs))
+        return self._cache[name]
+
+    def span(self) -> Tuple[float, float]:
+        ends = [(t[0], t[-1]) for t, _ in map(self.series, self.channels) if len(t)]
+        if not ends:
+            return 0.0, 0.0
+        return float(min(e[0] for e in ends)), float(max(e[1] for e in ends))
+
+
+def open_flight(path: str):
+    """Open a recorded flight log of either format."""
+    with open(meta_path(path)) as f:
+        fmt = json.load(f).get("format")
+    if fmt == COMPRESSED_FORMAT:
+        return CompressedFlightLog(path)
+    return FlightLog(path)
@@ -0,0 +1,307 @@
+# server.py
+# --------------------------------------------------------------------------
+#  Headless ground-station server: UDP ingest, recording and statistics
+#  without Tk, plus a local HTTP snapshot endpoint and a WebSocket feed of
+#  batched, delta-encoded updates for any number of crew laptops
+#  © 2025  Arbalest Rocketry
+# --------------------------------------------------------------------------
+#
+#  Endpoints
+#    GET /snapshot                 latest packet, per-channel state, link stats,
+#                                  detector health, events
+#    GET /window?field=Alt&points=500[&t0=..&t1=..]
+#                                  downsampled history of one channel
+#    GET /ws[?rate=5&encoding=gsz] WebSocket; one "snapshot" message, then a
+#                                  "delta" message per tick with only new data
+#
+#  Delta channel encoding: {"t0": first timestamp, "dt": [µs offsets from the
+#  previous sample], "v": [values]}, so clients rebuild t by cumulative sum.
+#  With encoding=gsz each channel is {"gsz": base64 codec blocks} instead
+#  (see codec.py; decode_series restores the samples).
+#
+#  Usage:  python server.py --udp-port 5005 --http-port 8080 --rate 10 --record flight.gsz
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import struct
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from codec import encode_series
+from telemetry_udp import Telemetry
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_TEXT, OP_CLOSE, OP_PING, OP_PONG = 0x1, 0x8, 0x9, 0xA
+ENCODINGS = ("json", "gsz")
+
+
+def _clean(values):
+    """JSON-safe list: NaN and ±inf become null (browsers reject NaN/Infinity)."""
+    v = np.asarray(values, dtype=float)
+    return np.where(np.isfinite(v), v, None).tolist()
+
+
+def _scalar(v):
+    """JSON-safe packet value; strings pass through, non-finite floats become null."""
+    return None if isinstance(v, float) and not math.isfinite(v) else v
+
+
+def _encode_samples(t, v, encoding="json"):
+    if encoding == "gsz":
+        return {"gsz": base64.b64encode(encode_series(t, v)).decode()}
+    t_us = np.round(np.asarray(t) * 1e6).astype(np.int64)
+    return {"t0": float(t[0]), "dt": np.diff(t_us).tolist(), "v": _clean(v)}
+
+
+def _ws_frame(opcode, payload):
+    head = bytes([0x80 | opcode])
+    n = len(payload)
+    if n < 126:
+        head += bytes([n])
+    elif n < 1 << 16:
+        head += bytes([126]) + struct.pack("!H", n)
+    else:
+        head += bytes([127]) + struct.pack("!Q", n)
+    return head + payload
+
+
+async def _ws_read(reader):
+    """Read one client frame; return (opcode, payload)."""
+    b0, b1 = await reader.readexactly(2)
+    n = b1 & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", await reader.readexactly(8))[0]
+    mask = await reader.readexactly(4) if b1 & 0x80 else None
+    payload = await reader.readexactly(n)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return b0 & 0x0F, payload
+
+
+class FeedServer:
+    """HTTP + WebSocket front end over a shared Telemetry instance."""
+
+    def __init__(self, telemetry, host="127.0.0.1", port=8080, rate=10.0, window=200):
+        self.telemetry = telemetry
+        self.host = host
+        self.port = port
+        self.rate = rate                # max WebSocket updates per second
+        self.window = window            # samples per channel in the initial snapshot
+        self.clients = 0
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    # ───────────────────────────────────────────────────────────────────
+    def snapshot(self, window=0, encoding="json"):
+        """Current state as a JSON-ready dict; ``window`` recent samples per channel."""
+        tel = self.telemetry
+        n_events, events = tel.get_events_since(0)
+        channels = {}
+        for field in tel.fields():
+            count, t, v = tel.get_since(field, 0)
+            if not count:
+                continue
+            entry = {"count": count, "last": [float(t[-1]), _clean(v[-1:])[0]]}
+            if window:
+                entry.update(_encode_samples(t[-window:], v[-window:], encoding))
+            channels[field] = entry
+        return {
+            "type": "snapshot",
+            "time": time.time(),
+            "packets": tel.packet_count,
+            "latest": {k: _scalar(v) for k, v in (tel.get_latest() or {}).items()},
+            "channels": channels,
+            "link": tel.get_link_stats(),
+            "health": tel.get_health(),
+            "events": events,
+            "event_count": n_events,        # WebSocket clients continue from here
+        }
+
+    def delta(self, cursor, encoding="json"):
+        """Only what changed since ``cursor`` (field -> count, plus "#events"); updates cursor."""
+        tel = self.telemetry
+        channels = {}
+        for field in tel.fields():
+            count, t, v = tel.get_since(field, cursor.get(field, 0))
+            if count < cursor.get(field, 0):            # telemetry was reset
+                count, t, v = tel.get_since(field, 0)
+            cursor[field] = count
+            if len(t):
+                channels[field] = _encode_samples(t, v, encoding)
+        n_events, events = tel.get_events_since(cursor.get("#events", 0))
+        if n_events < cursor.get("#events", 0):
+            n_events, events = tel.get_events_since(0)
+        cursor["#events"] = n_events
+        if not channels and not events:
+            return None
+        return {"type": "delta", "time": time.time(), "packets": tel.packet_count,
+                "channels": channels, "events": events, "link": tel.get_link_stats(),
+                "health": tel.get_health()["status"]}
+
+    # ───────────────────────────────────────────────────────────────────
+    async def _handle(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            lines = request.decode("latin-1").split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    k, v = line.split(":", 1)
+                    headers[k.strip().lower()] = v.strip()
+            url = urlsplit(target)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+            if method != "GET":
+                await self._respond(writer, 405, {"error": "method not allowed"})
+            elif url.path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self._serve_ws(reader, writer, headers, query)
+            elif url.path in ("/", "/snapshot"):
+                await self._respond(writer, 200, self.snapshot(int(query.get("window", 0))))
+            elif url.path == "/window":
+                await self._respond(writer, 200, self._window(query))
+            else:
+                await self._respond(writer, 404, {"error": "not found"})
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as e:
+            await self._respond(writer, 400, {"error": str(e)})
+        finally:
+            writer.close()
+
+    def _window(self, query):
+        if "field" not in query:
+            raise ValueError("field is required")
+        t0 = float(query["t0"]) if "t0" in query else None
+        t1 = float(query["t1"]) if "t1" in query else None
+        w = self.telemetry.get_window(query["field"], t0, t1, int(query.get("points", 500)))
+        return {"field": query["field"], "level": w.level, "t": w.t.tolist(),
+                "mean": _clean(w.mean), "min": _clean(w.min), "max": _clean(w.max), "n": w.n.tolist()}
+
+    async def _respond(self, writer, status, body):
+        payload = json.dumps(body, allow_nan=False).encode()
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\n"
+                     "Content-Type: application/json\r\n"
+                     "Access-Control-Allow-Origin: *\r\n"
+                     f"Content-Length: {len(payload)}\r\n"
+                     "Connection: close\r\n\r\n".encode() + payload)
+        await writer.drain()
+
+    async def _serve_ws(self, reader, writer, headers, query):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            raise ValueError("missing Sec-WebSocket-Key")
+        # Validate before the upgrade; once the 101 is out only frames may follow
+        encoding = query.get("encoding", "json")
+        if encoding not in ENCODINGS:
+            raise ValueError(f"unknown encoding {encoding!r}")
+        rate = min(float(query.get("rate", self.rate)), self.rate)
+        period = 1.0 / rate if rate > 0 and math.isfinite(rate) else 1.0 / self.rate
+
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write("HTTP/1.1 101 Switching Protocols\r\n"
+                     "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                     f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode())
+        closed = asyncio.Event()
+        listener = asyncio.ensure_future(self._ws_listen(reader, writer, closed))
+        self.clients += 1
+        try:
+            cursor = {}
+            snap = self.snapshot(self.window, encoding)
+            for field, entry in snap["channels"].items():
+                cursor[field] = entry["count"]
+            cursor["#events"] = snap["event_count"]
+            await self._ws_send(writer, snap)
+            while not closed.is_set():
+                try:
+                    await asyncio.wait_for(closed.wait(), period)
+                except asyncio.TimeoutError:
+                    pass
+                msg = self.delta(cursor, encoding)
+                if msg is not None and not closed.is_set():
+                    await self._ws_send(writer, msg)
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            listener.cancel()
+
+    async def _ws_send(self, writer, msg):
+        writer.write(_ws_frame(OP_TEXT, json.dumps(msg, allow_nan=False).encode()))
+        await writer.drain()
+
+    async def _ws_listen(self, reader, writer, closed):
+        # Clients only talk control frames to us: answer pings, honour close
+        try:
+            while True:
+                opcode, payload = await _ws_read(reader)
+                if opcode == OP_CLOSE:
+                    writer.write(_ws_frame(OP_CLOSE, payload[:2]))
+                    break
+                if opcode == OP_PING:
+                    writer.write(_ws_frame(OP_PONG, payload))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            closed.set()
+
+
+# ────────────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless ground-station server")
+    parser.add_argument("--udp-ip", default="127.0.0.1")
+    parser.add_argument("--udp-port", type=int, default=5005)
+    parser.add_argument("--http-host", default="127.0.0.1",
+                        help="interface for HTTP/WebSocket clients (0.0.0.0 to serve the field LAN)")
+    parser.add_argument("--http-port", type=int, default=8080)
+    parser.add_argument("--rate", type=float, default=10.0, help="max WebSocket updates per second")
+    parser.add_argument("--maxlen", type=int, default=1000, help="full-resolution samples kept per channel")
+    parser.add_argument("--record", metavar="PATH", help="record the flight log to PATH (.gsz for the compressed format)")
+    parser.add_argument("--stats-every", type=float, default=10.0,
+                        help="seconds between link statistics lines on stdout (0 to disable)")
+    args = parser.parse_args(argv)
+
+    telemetry = Telemetry(args.udp_ip, args.udp_port, maxlen=args.maxlen)
+    if args.record:
+        telemetry.start_recording(args.record)
+
+    async def run():
+        server = await FeedServer(telemetry, args.http_host, args.http_port, args.rate).start()
+        print(f"Telemetry on udp://{args.udp_ip}:{args.udp_port}, "
+              f"feed on http://{server.host}:{server.port}/ (WebSocket /ws)", flush=True)
+        while True:
+            await asyncio.sleep(args.stats_every or 3600)
+            if args.stats_every:
+                for src, st in telemetry.get_link_stats().items():
+                    loss = "n/a" if st["loss_pct"] is None else f"{st['loss_pct']:.1f}%"
+                    print(f"{src}: {st['rate_hz']:.1f} Hz, loss {loss}, "
+                          f"jitter {st['jitter_ms']:.1f} ms, clients {server.clients}", flush=True)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        telemetry.close()
+
+
+if __name__ == "__main__":
+    main()
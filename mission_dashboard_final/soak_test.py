@@ -0,0 +1,330 @@
+# soak_test.py
+# --------------------------------------------------------------------------
+#  Long-duration soak test: runs the full MainApp against a synthetic UDP
+#  telemetry stream and watches for memory growth and UI latency
+#  © 2025  Arbalest Rocketry
+# --------------------------------------------------------------------------
+#
+#  Re-runs itself under xvfb-run when there is no display. A background
+#  thread replays repeating synthetic flights at --rate packets/s and
+#  --speed x real time. Every --sample-every seconds the app's event loop
+#  records:
+#    rss_mb         resident set size
+#    py_objects     objects tracked by the garbage collector (after a collect)
+#    tk_widgets     widgets in the window tree
+#    canvas_items   items on every Tk canvas (map paths, gauges, plots)
+#    mpl_artists    artists across all Matplotlib figures
+#    after_pending  scheduled Tk ``after`` callbacks
+#    late_p99_ms    lateness of a periodic ``after`` probe (p99 and max)
+#
+#  After --warmup minutes, each count gets a least-squares growth rate per
+#  hour. The run fails when a growth rate or a latency figure exceeds its
+#  limit. samples.csv (written as the run goes) and summary.json land in
+#  --report. Use --compare to diff against a summary from another version.
+#
+#  Usage:  python soak_test.py --hours 0.02                      (smoke run)
+#          python soak_test.py --hours 8 --rate 200 --speed 4 --report soak_report
+#          python soak_test.py --hours 0.25 --compare old_report/summary.json
+
+import argparse
+import csv
+import gc
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import tkinter as tk
+
+import numpy as np
+
+SAMPLE_FIELDS = ["elapsed_s", "rss_mb", "py_objects", "tk_widgets", "canvas_items", "mpl_artists",
+                 "after_pending", "late_p99_ms", "late_max_ms", "packets"]
+GROWTH_FIELDS = ["rss_mb", "py_objects", "tk_widgets", "canvas_items", "mpl_artists", "after_pending"]
+PAGES = ["dashboard", "plotting", "gps", "analytics"]
+PROBE_MS = 100
+
+
+# ────────────────────────────────────────────────────────────────────────────
+def flight_state(tf):
+    """(altitude m, acceleration m/s²) at ``tf`` seconds into a 300 s synthetic flight cycle."""
+    tf %= 300.0
+    if tf < 30.0:                                   # pad
+        return 0.0, 0.0
+    tf -= 30.0
+    if tf < 3.0:                                    # boost
+        return 40.0 * tf * tf, 80.0
+    tf -= 3.0
+    if tf < 24.5:                                   # coast to apogee
+        return 360.0 + 240.0 * tf - 4.9 * tf * tf, -9.8
+    apogee = 360.0 + 240.0 * 24.5 - 4.9 * 24.5 ** 2
+    tf -= 24.5
+    drogue = (apogee - 300.0) / 30.0
+    if tf < drogue:                                 # drogue descent
+        return apogee - 30.0 * tf, 0.0
+    return max(300.0 - 6.0 * (tf - drogue), 0.0), 0.0   # main, then landed
+
+
+class SyntheticStream(threading.Thread):
+    """Sends repeating synthetic flights as ASCII telemetry packets."""
+
+    def __init__(self, addr, rate=200.0, speed=1.0, gps_every=10):
+        super().__init__(daemon=True)
+        self.addr = addr
+        self.rate = rate
+        self.speed = speed
+        self.gps_every = gps_every
+        self.sent = 0
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        period = 1.0 / self.rate
+        next_send = time.monotonic()
+        lat, lon = 43.7735, -79.5015
+        while not self._stop_event.is_set():
+            tf = self.sent * period * self.speed
+            alt, acc = flight_state(tf)
+            fields = [f"Seq:{self.sent % 65536}", f"Alt:{alt + random.gauss(0, 0.5):.2f}",
+                      f"Accel:{acc + random.gauss(0, 0.2):.2f}",
+                      f"P:{101.325 - alt / 120 + random.gauss(0, 0.002):.3f}",
+                      f"T:{20 - alt / 150 + random.gauss(0, 0.05):.2f}",
+                      f"Yaw:{random.gauss(0, 2):.2f}", f"Pitch:{random.gauss(85, 1):.2f}",
+                      f"Roll:{(tf * 30) % 360 - 180:.2f}", f"Gyro:{random.gauss(30, 1):.2f}"]
+            if self.sent % self.gps_every == 0:
+                drift = (tf % 300.0) * 1e-6
+                fields += [f"Lat:{lat + drift:.6f}", f"Lon:{lon + drift / 2:.6f}"]
+            sock.sendto(",".join(fields).encode(), self.addr)
+            self.sent += 1
+            next_send += period
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -1.0:
+                next_send = time.monotonic()        # fell behind; do not burst to catch up
+        sock.close()
+
+
+# ────────────────────────────────────────────────────────────────────────────
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        import resource             # peak, not current, off Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def tk_counts(root):
+    """(widgets, canvas items) in the window tree under ``root``."""
+    widgets = items = 0
+    stack = [root]
+    while stack:
+        w = stack.pop()
+        widgets += 1
+        if isinstance(w, tk.Canvas):
+            items += len(w.find_all())
+        stack.extend(w.winfo_children())
+    return widgets, items
+
+
+def mpl_artists():
+    import matplotlib.pyplot as plt
+    return sum(len(plt.figure(num).findobj()) for num in plt.get_fignums())
+
+
+def growth_per_hour(rows, field, warmup_s):
+    pts = [(r["elapsed_s"] / 3600.0, r[field]) for r in rows if r["elapsed_s"] >= warmup_s]
+    if len(pts) < 3:
+        return None
+    x, y = np.array(pts).T
+    if x[-1] <= x[0]:
+        return None
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def git_version():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                              text=True, timeout=5, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+# ────────────────────────────────────────────────────────────────────────────
+class Soak:
+    """Drives page changes and samples health from inside the app's event loop."""
+
+    def __init__(self, app, stream, args):
+        self.app = app
+        self.stream = stream
+        self.args = args
+        self.rows = []
+        self.lateness = []
+        self.page = 0
+        self.started = time.monotonic()
+        self._expected = None
+        os.makedirs(args.report, exist_ok=True)
+        self._csv_file = open(os.path.join(args.report, "samples.csv"), "w", newline="")
+        self._csv = csv.DictWriter(self._csv_file, SAMPLE_FIELDS)
+        self._csv.writeheader()
+
+    def start(self):
+        self.app.login_success("soak", "SOAK")
+        self.app.after(PROBE_MS, self._probe)
+        self.app.after(int(self.args.page_every * 1000), self._next_page)
+        self.app.after(int(self.args.sample_every * 1000), self._sample)
+        self.app.after(int(self.args.hours * 3600 * 1000), self._finish)
+
+    def _probe(self):
+        now = time.monotonic()
+        if self._expected is not None:
+            self.lateness.append(max(now - self._expected, 0.0) * 1000.0)
+        self._expected = now + PROBE_MS / 1000.0
+        self.app.after(PROBE_MS, self._probe)
+
+    def _next_page(self):
+        self.page = (self.page + 1) % len(PAGES)
+        self.app.show_page(PAGES[self.page])
+        self.app.after(int(self.args.page_every * 1000), self._next_page)
+
+    def _sample(self):
+        late = np.array(self.lateness) if self.lateness else np.zeros(1)
+        self.lateness = []
+        gc.collect()
+        widgets, items = tk_counts(self.app)
+        row = {
+            "elapsed_s": round(time.monotonic() - self.started, 1),
+            "rss_mb": round(rss_mb(), 2),
+            "py_objects": len(gc.get_objects()),
+            "tk_widgets": widgets,
+            "canvas_items": items,
+            "mpl_artists": mpl_artists(),
+            "after_pending": len(self.app.tk.splitlist(self.app.tk.call("after", "info"))),
+            "late_p99_ms": round(float(np.percentile(late, 99)), 1),
+            "late_max_ms": round(float(late.max()), 1),
+            "packets": self.app.telemetry.packet_count,
+        }
+        self.rows.append(row)
+        self._csv.writerow(row)
+        self._csv_file.flush()
+        print(" ".join(f"{k}={row[k]}" for k in SAMPLE_FIELDS), flush=True)
+        self._expected = None           # the collect above is not event-loop lateness
+        self.app.after(int(self.args.sample_every * 1000), self._sample)
+
+    def _finish(self):
+        self.stream.stop()
+        self._csv_file.close()
+        self.summary = summarize(self.rows, self.args)
+        with open(os.path.join(self.args.report, "summary.json"), "w") as f:
+            json.dump(self.summary, f, indent=2)
+        self.app._on_close()
+
+
+def summarize(rows, args):
+    warmup_s = min(args.warmup * 60.0, args.hours * 3600.0 / 4)
+    limits = {"rss_mb": args.max_rss_mb_per_hour, "py_objects": args.max_objects_per_hour,
+              "tk_widgets": args.max_widgets_per_hour, "canvas_items": args.max_canvas_items_per_hour,
+              "mpl_artists": args.max_artists_per_hour, "after_pending": args.max_after_per_hour}
+    growth = {f: growth_per_hour(rows, f, warmup_s) for f in GROWTH_FIELDS}
+    failures = [f"{f} grows {g:.1f}/h (limit {limits[f]:g}/h)"
+                for f, g in growth.items() if g is not None and g > limits[f]]
+    settled = [r for r in rows if r["elapsed_s"] >= warmup_s] or rows
+    late_p99 = max((r["late_p99_ms"] for r in settled), default=0.0)
+    late_max = max((r["late_max_ms"] for r in settled), default=0.0)
+    if late_p99 > args.max_late_p99_ms:
+        failures.append(f"after lateness p99 {late_p99:.0f} ms (limit {args.max_late_p99_ms:g} ms)")
+    if late_max > args.max_late_ms:
+        failures.append(f"after lateness max {late_max:.0f} ms (limit {args.max_late_ms:g} ms)")
+    return {
+        "version": git_version(),
+        "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("compare", "report")},
+        "samples": len(rows),
+        "warmup_s": warmup_s,
+        "first": settled[0] if settled else None,
+        "last": rows[-1] if rows else None,
+        "growth_per_hour": growth,
+        "limits_per_hour": limits,
+        "late_p99_ms": late_p99,
+        "late_max_ms": late_max,
+        "failures": failures,
+        "passed": not failures and len(rows) > 0,
+    }
+
+
+def compare(summary, path):
+    with open(path) as f:
+        old = json.load(f)
+    print(f"\n{'metric':<16} {old.get('version') or 'previous':>14} {summary['version'] or 'this run':>14}")
+    for f in GROWTH_FIELDS:
+        a, b = old["growth_per_hour"].get(f), summary["growth_per_hour"].get(f)
+        fmt = lambda g: "n/a" if g is None else f"{g:+.1f}/h"
+        print(f"{f:<16} {fmt(a):>14} {fmt(b):>14}")
+    for f in ("late_p99_ms", "late_max_ms"):
+        print(f"{f:<16} {old[f]:>14.1f} {summary[f]:>14.1f}")
+
+
+# ────────────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak-test the mission dashboard for memory growth and UI latency")
+    parser.add_argument("--hours", type=float, default=1.0, help="run length")
+    parser.add_argument("--rate", type=float, default=200.0, help="synthetic packets per second")
+    parser.add_argument("--speed", type=float, default=1.0, help="simulated flight time per real second")
+    parser.add_argument("--udp-ip", default="127.0.0.1", help="address MainApp's Telemetry binds and the stream targets")
+    parser.add_argument("--udp-port", type=int, default=5005, help="UDP port for both (pick a free one beside a live dashboard)")
+    parser.add_argument("--sample-every", type=float, default=30.0, help="seconds between samples")
+    parser.add_argument("--page-every", type=float, default=20.0, help="seconds between page switches")
+    parser.add_argument("--warmup", type=float, default=5.0, help="minutes excluded from growth fits")
+    parser.add_argument("--report", default="soak_report", help="output directory")
+    parser.add_argument("--compare", metavar="SUMMARY", help="summary.json of an earlier run to compare with")
+    parser.add_argument("--no-xvfb", action="store_true", help="never re-run under xvfb-run")
+    parser.add_argument("--max-rss-mb-per-hour", type=float, default=16.0)
+    parser.add_argument("--max-objects-per-hour", type=float, default=10000.0)
+    parser.add_argument("--max-widgets-per-hour", type=float, default=1.0)
+    parser.add_argument("--max-canvas-items-per-hour", type=float, default=100.0)
+    parser.add_argument("--max-artists-per-hour", type=float, default=1.0)
+    parser.add_argument("--max-after-per-hour", type=float, default=1.0)
+    parser.add_argument("--max-late-p99-ms", type=float, default=250.0)
+    parser.add_argument("--max-late-ms", type=float, default=2000.0)
+    args = parser.parse_args(argv)
+
+    if not os.environ.get("DISPLAY") and not args.no_xvfb:
+        xvfb = shutil.which("xvfb-run")
+        if xvfb is None:
+            sys.exit("No DISPLAY and xvfb-run not found; install Xvfb or run with a display")
+        os.execv(xvfb, [xvfb, "-a", "-s", "-screen 0 1920x1080x24",
+                        sys.executable, os.path.abspath(__file__)] + (sys.argv[1:] if argv is None else argv))
+
+    args.report = os.path.abspath(args.report)
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))       # pages load AB_logo.png relatively
+    from main import MainApp
+
+    app = MainApp(args.udp_ip, args.udp_port)
+    stream = SyntheticStream((args.udp_ip, args.udp_port), args.rate, args.speed)
+    soak = Soak(app, stream, args)
+    stream.start()
+    soak.start()
+    app.mainloop()
+
+    summary = getattr(soak, "summary", None) or summarize(soak.rows, args)
+    print(f"\n{summary['samples']} samples, {stream.sent} packets sent")
+    for f, g in summary["growth_per_hour"].items():
+        print(f"  {f:<14} {'n/a' if g is None else f'{g:+.1f}/h':>12}   (limit {summary['limits_per_hour'][f]:g}/h)")
+    print(f"  after lateness p99 {summary['late_p99_ms']:.0f} ms, max {summary['late_max_ms']:.0f} ms")
+    if args.compare:
+        compare(summary, args.compare)
+    print("PASS" if summary["passed"] else "FAIL: " + "; ".join(summary["failures"] or ["no samples"]))
+    return 0 if summary["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,60 @@
 # telemetry_udp.py
 # Improved UDP-based telemetry receiver with thread safety, error logging, and graceful shutdown
 
+import math
+import os
 import socket
 import threading
 import time
-from collections import deque, defaultdict
+from collections import deque
+
+import numpy as np
+
+from anomaly import DetectorEngine
+
+from channels import Channel, resample, uniform_grid, common_span
+from history import Window
+from derived import default_pipeline
+from link_stats import LinkStats
+from recorder import FlightRecorder
+
+KNOWN_FIELDS = ["Yaw", "Pitch", "Roll", "Alt", "Lat", "Lon", "P", "T", "Accel", "Gyro"]
+MAX_BATCH = 256     # packets drained from the socket per ingest pass
+WATCHDOG_PERIOD = 0.2
+DEFAULT_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "detector_rules.json")
+
+
+def parse_packet(line):
+    """Parse a ``key:value,key:value`` telemetry line; numeric values become floats."""
+    return _parse(line)[0]
+
+
+def _parse(line):
+    # Returns (packet, number of malformed tokens)
+    pkt = {}
+    garbled = 0
+    for token in line.split(","):
+        if ":" not in token:
+            if token.strip():
+                garbled += 1
+            continue
+        key, val = token.split(":", 1)
+        key = key.strip()
+        val = val.strip()
+        if not key:
+            garbled += 1
+            continue
+        try:
+            val_conv = float(val)
+        except ValueError:
+            val_conv = val
+        pkt[key] = val_conv
+    return pkt, garbled
+
 
 class Telemetry:
-    def __init__(self, ip="127.0.0.1", port=5005, maxlen=1000):
+    def __init__(self, ip="127.0.0.1", port=5005, maxlen=1000, seq_field="Seq", seq_modulus=None,
+                 pipeline=None, rules_path=DEFAULT_RULES):
         # Create and bind UDP socket
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         try:
@@ -20,14 +67,34 @@ class Telemetry:
         self._lock = threading.Lock()
         self._running = True
 
-        # Telemetry storage (history limited by maxlen)
-        self.data = defaultdict(lambda: deque(maxlen=maxlen))
-        # Predefine known fields
-        for field in ["time", "Yaw", "Pitch", "Roll", "Alt", "Lat", "Lon", "P", "T", "Accel", "Gyro"]:
-            self.data[field]
+        # Telemetry storage: one timestamped channel per numeric field, so
+        # packets may carry any subset of fields. The last maxlen samples are
+        # kept at full resolution, older ones in downsampled history levels
+        self.maxlen = maxlen
+        self.channels = {field: Channel(field, maxlen) for field in KNOWN_FIELDS}
+        self.packet_count = 0
 
         self.latest = None           # most recent packet
         self.event_log = deque(maxlen=100)  # error and status messages
+        self.event_count = 0                # messages ever logged (for incremental readers)
+        self.recorder = None                # FlightRecorder while recording
+
+        # Link-quality metrics per source address (sequence numbers optional)
+        self.seq_field = seq_field
+        self.seq_modulus = seq_modulus
+        self.link_stats = {}
+
+        # Derived channels (vertical speed, Euler angles, flight phase, ...)
+        self.pipeline = pipeline if pipeline is not None else default_pipeline()
+
+        # Anomaly/fault detectors (stale data, range, rate, stuck, invalid values)
+        self.detector = DetectorEngine()
+        if rules_path:
+            try:
+                self.detector = DetectorEngine.from_config(rules_path)
+            except (OSError, ValueError, TypeError) as e:
+                self._log(f"Detector rules not loaded from {rules_path}: {e}")
+        self._next_watchdog = 0.0
 
         # Start background receive thread
         self._thread = threading.Thread(target=self._receive_loop, daemon=True)
@@ -36,41 +103,114 @@ class Telemetry:
     def _receive_loop(self):
         while self._running:
             try:
-                raw, _ = self.sock.recvfrom(4096)
-                recv_time = time.time()
-                line = raw.decode("utf-8", errors="ignore").strip()
-
-                # Parse key:value pairs
-                pkt = {}
-                for token in line.split(","):
-                    if ":" not in token:
-                        continue
-                    key, val = token.split(":", 1)
-                    key = key.strip()
-                    val = val.strip()
-                    try:
-                        val_conv = float(val)
-                    except ValueError:
-                        val_conv = val
-                    pkt[key] = val_conv
-
-                # Store parsed data thread-safely
-                with self._lock:
-                    self.latest = {"recv_time": recv_time, **pkt}
-                    for k, v in pkt.items():
-                        self.data[k].append(v)
-                    # Also record the receive timestamp
-                    self.data["time"].append(recv_time)
-
-            except BlockingIOError:
-                # No data; yield CPU
-                time.sleep(0.01)
+                # Drain whatever is queued so derived stages see whole batches
+                batch = []
+                try:
+                    while len(batch) < MAX_BATCH:
+                        raw, addr = self.sock.recvfrom(4096)
+                        batch.append((time.time(), addr, raw))
+                except BlockingIOError:
+                    pass
+                if batch:
+                    self._ingest(batch)
+                now = time.time()
+                if now >= self._next_watchdog:
+                    self._next_watchdog = now + WATCHDOG_PERIOD
+                    with self._lock:
+                        self._log_events(self.detector.check(now))
+                if not batch:
+                    # No data; yield CPU
+                    time.sleep(0.01)
+
             except Exception as e:
                 # Log unexpected errors
                 with self._lock:
-                    self.event_log.append(f"Error in receive loop: {e}")
+                    self._log(f"Error in receive loop: {e}")
                 time.sleep(0.1)
 
+    def _ingest(self, batch):
+        """Parse, derive and store a batch of (recv_time, addr, raw) datagrams."""
+        parsed, garbled = [], []
+        for recv_time, _, raw in batch:
+            pkt, bad = _parse(raw.decode("utf-8", errors="ignore").strip())
+            parsed.append((recv_time, pkt))
+            garbled.append(bad)
+
+        # Derive and store thread-safely
+        with self._lock:
+            events = self.pipeline.process(parsed)
+            rows = []
+            for (recv_time, addr, _), (_, pkt) in zip(batch, parsed):
+                self.latest = {"recv_time": recv_time, **pkt}
+                self.packet_count += 1
+                for k, v in pkt.items():
+                    if isinstance(v, float):
+                        self._channel(k).append(recv_time, v)
+                        rows.append((recv_time, k, v))
+                self._update_link(addr, recv_time, pkt.get(self.seq_field))
+            if self.recorder is not None:
+                self.recorder.write(rows)
+            events += self.detector.process([(t, pkt, bad) for (t, pkt), bad in zip(parsed, garbled)])
+            self._log_events(events)
+
+    def _log_events(self, events):
+        # Caller holds the lock
+        for t, msg in events:
+            self._log(f"{time.strftime('%H:%M:%S', time.localtime(t))} {msg}")
+
+    def _log(self, message):
+        # Caller holds the lock
+        self.event_log.append(message)
+        self.event_count += 1
+
+    def _channel(self, field):
+        # Caller holds the lock
+        ch = self.channels.get(field)
+        if ch is None:
+            ch = self.channels[field] = Channel(field, self.maxlen)
+        return ch
+
+    def _update_link(self, addr, recv_time, seq):
+        # Caller holds the lock
+        source = f"{addr[0]}:{addr[1]}"
+        stats = self.link_stats.get(source)
+        if stats is None:
+            stats = self.link_stats[source] = LinkStats(source, self.seq_modulus)
+            self._log(f"Link up: {source}")
+        if not isinstance(seq, float) or not math.isfinite(seq):
+            seq = None
+        missing = stats.update(recv_time, seq)
+        if missing:
+            self._log(f"Link gap: {missing} packet(s) missing from {source}")
+
+    def add_event(self, message):
+        """Append a message to the event log."""
+        with self._lock:
+            self._log(message)
+
+    def get_events(self, n=None):
+        """Return the last n event-log messages (all if n is None)."""
+        with self._lock:
+            events = list(self.event_log)
+        return events if n is None else events[-n:]
+
+    def get_events_since(self, count):
+        """Return (event_count, messages logged after ``count``) for incremental readers."""
+        with self._lock:
+            new = min(self.event_count - count, len(self.event_log))
+            return self.event_count, list(self.event_log)[len(self.event_log) - new:] if new > 0 else []
+
+    def get_link_stats(self):
+        """Return a snapshot of link metrics for every source seen so far."""
+        now = time.time()
+        with self._lock:
+            return {src: st.snapshot(now) for src, st in self.link_stats.items()}
+
+    def get_health(self):
+        """Return detector status ("ok"/"warn"/"fault"), active alarms and per-rule stats."""
+        with self._lock:
+            return self.detector.health()
+
     def get_latest(self):
         """Return the most recent packet (including recv_time)."""
         with self._lock:
@@ -79,18 +219,110 @@ class Telemetry:
     def get_history(self, field):
         """Return the history list for a given field."""
         with self._lock:
-            return list(self.data.get(field, []))
+            ch = self.channels.get(field)
+            return ch.values() if ch else []
+
+    def get_series(self, field):
+        """Return (timestamps, values) arrays for a given field."""
+        with self._lock:
+            ch = self.channels.get(field)
+            if ch is None:
+                return np.empty(0), np.empty(0)
+            return ch.arrays()
+
+    def get_window(self, field, t0=None, t1=None, points=1000):
+        """Return about ``points`` (t, mean, min, max) rows of a field over [t0, t1].
+
+        Covers the whole session when t0/t1 are omitted; older ranges are
+        served from downsampled history levels.
+        """
+        with self._lock:
+            ch = self.channels.get(field)
+            if ch is None:
+                empty = np.empty(0)
+                return Window(empty, empty, empty, empty, 0, empty)
+            return ch.query(t0, t1, points)
+
+    def get_span(self, fields=None):
+        """Return the (earliest, latest) timestamp held for ``fields`` (all by default), or None."""
+        with self._lock:
+            names = self.channels if fields is None else [f for f in fields if f in self.channels]
+            spans = [s for s in (self.channels[f].span() for f in names) if s is not None]
+        if not spans:
+            return None
+        return min(s[0] for s in spans), max(s[1] for s in spans)
+
+    def get_since(self, field, count):
+        """Return (sample_count, timestamps, values) appended to a field after ``count``.
+
+        Samples that already left the full-resolution window are skipped.
+        """
+        with self._lock:
+            ch = self.channels.get(field)
+            if ch is None:
+                return 0, np.empty(0), np.empty(0)
+            return (ch.count,) + ch.since(count)
+
+    def get_last(self, field):
+        """Return the most recent (timestamp, value) for a field, or None."""
+        with self._lock:
+            ch = self.channels.get(field)
+            return ch.last() if ch else None
+
+    def fields(self):
+        """Return the names of all channels seen so far."""
+        with self._lock:
+            return list(self.channels)
+
+    def resample(self, fields, dt=None, n=None, t0=None, t1=None, method="hold"):
+        """Resample fields onto a shared uniform grid.
+
+        The grid spans [t0, t1] (defaulting to the span covered by the fields)
+        and is defined by a step ``dt`` or a point count ``n``. Returns
+        ``(grid, {field: values})``; see ``channels.resample`` for methods.
+        """
+        series = {f: self.get_series(f) for f in fields}
+        span = common_span(series.values())
+        if span is None:
+            return np.empty(0), {f: np.empty(0) for f in fields}
+        t0 = span[0] if t0 is None else t0
+        t1 = span[1] if t1 is None else t1
+        grid = uniform_grid(t0, t1, dt=dt, n=n)
+        return grid, resample(series, grid, method)
 
     def reset(self):
         """Clear all stored data and logs."""
         with self._lock:
-            for dq in self.data.values():
-                dq.clear()
+            for ch in self.channels.values():
+                ch.clear()
+            self.packet_count = 0
             self.latest = None
             self.event_log.clear()
+            self.link_stats.clear()
+            self.pipeline.reset()
+            self.detector.reset()
+            self.event_count = 0
+
+    def start_recording(self, path):
+        """Record every stored sample to a flight log at ``path`` (see recorder.py)."""
+        recorder = FlightRecorder(path)
+        with self._lock:
+            previous, self.recorder = self.recorder, recorder
+            self._log(f"Recording to {path}")
+        if previous is not None:
+            previous.close()
+
+    def stop_recording(self):
+        """Flush and close the flight log, if recording."""
+        with self._lock:
+            recorder, self.recorder = self.recorder, None
+            if recorder is not None:
+                recorder.close()
+                self._log(f"Recording stopped: {recorder.records} samples")
 
     def close(self):
         """Stop the receive loop and close the socket."""
         self._running = False
         self._thread.join(timeout=1)
+        self.stop_recording()
         self.sock.close()
@@ -12,6 +12,8 @@ from vpython import canvas, vector, color, arrow, cylinder, cone, box, compound,
 import math
 import numpy as np
 
+from derived import quat_to_euler
+
 UDP_IP = '127.0.0.1'
 UDP_PORT = 5006
 
@@ -64,14 +66,12 @@ while True:
             q1 = parsed['qx']
             q2 = parsed['qy']
             q3 = parsed['qz']
-            norm = math.sqrt(q0*q0 + q1*q1 + q2*q2 + q3*q3)
-            if norm == 0:
+            roll, pitch, yaw = (float(a) for a in quat_to_euler(q0, q1, q2, q3))
+            if roll != roll:            # zero-norm quaternion
                 continue
-            q0, q1, q2, q3 = q0 / norm, q1 / norm, q2 / norm, q3 / norm
-
-            roll = -math.atan2(2*(q0*q1 + q2*q3), 1 - 2*(q1*q1 + q2*q2))
-            pitch = math.asin(2*(q0*q2 - q3*q1))
-            yaw = -math.atan2(2*(q0*q3 + q1*q2), 1 - 2*(q2*q2 + q3*q3)) - np.pi/2
+            # Display convention of this viewer: mirrored roll/yaw, yaw offset 90°
+            roll = -roll
+            yaw = -yaw - np.pi/2
 
             k = vector(math.cos(yaw)*math.cos(pitch), math.sin(pitch), math.sin(yaw)*math.cos(pitch))
             y_ref = vector(0, 1, 0)
@@ -0,0 +1,205 @@
+# test_server.py
+# --------------------------------------------------------------------------
+#  Loopback tests for the headless feed server (server.py)
+#  © 2025  Arbalest Rocketry
+# --------------------------------------------------------------------------
+#
+#  Each test binds Telemetry and FeedServer to ephemeral ports on 127.0.0.1
+#  and talks to them over real UDP, HTTP and WebSocket connections.
+#
+#  Usage:  python -m unittest test_server      (or python -m pytest test_server.py)
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import socket
+import struct
+import time
+import unittest
+
+from server import OP_CLOSE, OP_TEXT, WS_GUID, FeedServer, _ws_read
+from telemetry_udp import Telemetry
+
+
+class ServerLoopbackTest(unittest.IsolatedAsyncioTestCase):
+    RATE = 20.0
+
+    async def asyncSetUp(self):
+        self.tel = Telemetry(port=0, rules_path=None)
+        self.udp_addr = self.tel.sock.getsockname()
+        self.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.server = await FeedServer(self.tel, port=0, rate=self.RATE, window=50).start()
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+        self.udp.close()
+        self.tel.close()
+
+    # ── helpers ───────────────────────────────────────────────────────
+    async def send(self, *packets):
+        for pkt in packets:
+            self.udp.sendto(pkt.encode(), self.udp_addr)
+        await self.wait_for(lambda: self.tel.packet_count >= len(packets))
+
+    async def wait_for(self, cond, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while not cond():
+            if time.monotonic() > deadline:
+                self.fail("timed out waiting for telemetry")
+            await asyncio.sleep(0.01)
+
+    @staticmethod
+    def strict_json(payload):
+        """Parse like a browser's JSON.parse: NaN/Infinity are errors."""
+        def reject(token):
+            raise ValueError(f"non-standard JSON constant {token}")
+        return json.loads(payload, parse_constant=reject)
+
+    async def http_get(self, path):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: test\r\n\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        head, _, body = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), self.strict_json(body)
+
+    async def ws_connect(self, query=""):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.server.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write(f"GET /ws{query} HTTP/1.1\r\nHost: test\r\nUpgrade: websocket\r\n"
+                     f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                     "Sec-WebSocket-Version: 13\r\n\r\n".encode())
+        head = await reader.readuntil(b"\r\n\r\n")
+        self.addCleanup(writer.close)
+        return key, head.decode("latin-1"), reader, writer
+
+    async def ws_recv(self, reader, timeout=2.0):
+        opcode, payload = await asyncio.wait_for(_ws_read(reader), timeout)
+        self.assertEqual(opcode, OP_TEXT)
+        return self.strict_json(payload)
+
+    @staticmethod
+    def ws_close(writer):
+        mask, payload = os.urandom(4), struct.pack("!H", 1000)
+        writer.write(bytes([0x80 | OP_CLOSE, 0x80 | len(payload)]) + mask +
+                     bytes(b ^ mask[i % 4] for i, b in enumerate(payload)))
+
+    @staticmethod
+    def samples(msg, field):
+        """Values of one channel in a json-encoded snapshot/delta message."""
+        entry = msg["channels"].get(field)
+        return entry["v"] if entry else []
+
+    # ── HTTP ──────────────────────────────────────────────────────────
+    async def test_snapshot(self):
+        await self.send("Seq:1,Alt:10.5,P:101.3", "Seq:2,Alt:11.5,T:nan")
+        status, snap = await self.http_get("/snapshot")
+        self.assertEqual(status, 200)
+        self.assertEqual(snap["type"], "snapshot")
+        self.assertEqual(snap["packets"], 2)
+        self.assertEqual(snap["channels"]["Alt"]["count"], 2)
+        self.assertEqual(snap["channels"]["Alt"]["last"][1], 11.5)
+        self.assertIsNone(snap["latest"]["T"])          # NaN is sent as null
+        self.assertEqual(len(snap["link"]), 1)
+
+    async def test_non_finite_values_are_null(self):
+        await self.send("Alt:1.0", "Alt:inf,Lat:-inf,T:nan,Mode:X")
+        status, snap = await self.http_get("/snapshot?window=10")
+        self.assertEqual(status, 200)
+        self.assertEqual(snap["channels"]["Alt"]["v"], [1.0, None])
+        self.assertEqual(snap["channels"]["Lat"]["last"][1], None)
+        latest = {k: snap["latest"][k] for k in ("Alt", "Lat", "T", "Mode")}
+        self.assertEqual(latest, {"Alt": None, "Lat": None, "T": None, "Mode": "X"})
+        self.assertEqual(snap["event_count"], self.tel.get_events_since(0)[0])
+
+        _, _, reader, writer = await self.ws_connect()
+        await self.ws_recv(reader)
+        self.udp.sendto(b"Alt:-inf,Lat:inf", self.udp_addr)
+        msg = await self.ws_recv(reader)
+        self.assertEqual(self.samples(msg, "Alt"), [None])
+        self.ws_close(writer)
+
+    async def test_window(self):
+        await self.send(*(f"Alt:{i}" for i in range(40)))
+        status, w = await self.http_get("/window?field=Alt&points=10")
+        self.assertEqual(status, 200)
+        self.assertEqual(w["field"], "Alt")
+        self.assertLessEqual(len(w["t"]), 40)
+        self.assertTrue(len(w["t"]) == len(w["mean"]) == len(w["min"]) == len(w["max"]))
+        self.assertEqual(min(w["min"]), 0.0)
+        self.assertEqual(max(w["max"]), 39.0)
+
+        status, body = await self.http_get("/window?points=10")
+        self.assertEqual(status, 400)
+        self.assertIn("field", body["error"])
+
+    # ── WebSocket ─────────────────────────────────────────────────────
+    async def test_ws_handshake(self):
+        key, head, reader, writer = await self.ws_connect()
+        self.assertTrue(head.startswith("HTTP/1.1 101"))
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        self.assertIn(f"Sec-WebSocket-Accept: {accept}", head)
+        self.assertEqual((await self.ws_recv(reader))["type"], "snapshot")
+        self.ws_close(writer)
+        opcode, _ = await asyncio.wait_for(_ws_read(reader), 2.0)
+        self.assertEqual(opcode, OP_CLOSE)
+
+    async def test_ws_rejects_bad_query_before_upgrade(self):
+        for query in ("?encoding=xml", "?rate=fast"):
+            _, head, _, _ = await self.ws_connect(query)
+            self.assertTrue(head.startswith("HTTP/1.1 400"), query)
+
+    async def test_snapshot_then_delta(self):
+        await self.send("Seq:1,Alt:1", "Seq:2,Alt:2")
+        _, _, reader, writer = await self.ws_connect()
+        snap = await self.ws_recv(reader)
+        self.assertEqual(snap["type"], "snapshot")
+        self.assertEqual(self.samples(snap, "Alt"), [1.0, 2.0])
+
+        for i in range(3, 6):
+            self.udp.sendto(f"Seq:{i},Alt:{i}".encode(), self.udp_addr)
+        seen = []
+        while len(seen) < 3:
+            msg = await self.ws_recv(reader)
+            self.assertEqual(msg["type"], "delta")
+            seen += self.samples(msg, "Alt")
+        self.assertEqual(seen, [3.0, 4.0, 5.0])        # only new samples, none repeated
+        self.ws_close(writer)
+
+    async def test_cursor_after_reset(self):
+        await self.send(*(f"Alt:{i}" for i in range(10)))
+        _, _, reader, writer = await self.ws_connect()
+        self.assertEqual(len(self.samples(await self.ws_recv(reader), "Alt")), 10)
+
+        self.tel.reset()
+        self.udp.sendto(b"Alt:100", self.udp_addr)
+        self.udp.sendto(b"Alt:101", self.udp_addr)
+        seen = []
+        while len(seen) < 2:
+            seen += self.samples(await self.ws_recv(reader), "Alt")
+        self.assertEqual(seen, [100.0, 101.0])         # counts went backwards; restart at 0
+        self.ws_close(writer)
+
+    async def test_rate_cap(self):
+        _, _, reader, writer = await self.ws_connect("?rate=1000")   # above the server's cap
+        await self.ws_recv(reader)
+
+        async def feed():
+            for i in range(10_000):
+                self.udp.sendto(f"Alt:{i}".encode(), self.udp_addr)
+                await asyncio.sleep(0.002)
+        feeder = asyncio.ensure_future(feed())
+        stamps = []
+        while len(stamps) < 6:
+            await self.ws_recv(reader)
+            stamps.append(time.monotonic())
+        feeder.cancel()
+        intervals = [b - a for a, b in zip(stamps, stamps[1:])]
+        self.assertGreaterEqual(min(intervals), 0.8 / self.RATE)
+        self.ws_close(writer)
+
+
+if __name__ == "__main__":
+    unittest.main()